@@ -0,0 +1,298 @@
+"""Versión asíncrona (asyncio) de las operaciones CRUD de app_alimentos.py.
+
+Usa el cliente asíncrono nativo de PyMongo (AsyncMongoClient, PyMongo >= 4.9), que
+reemplaza a Motor, con un solo cliente compartido por proceso; con un PyMongo
+anterior usa Motor si está instalado. Las consultas y operaciones
+de escritura se construyen con las mismas funciones que la versión síncrona, y
+la caché de buscar_por_nombre también es la misma. A diferencia de la versión
+síncrona, son solo capa de datos: devuelven resultados e informan por el logger
+"alimentos", para poder usarse desde un servicio web.
+"""
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    from pymongo import AsyncMongoClient
+except ImportError:  # PyMongo < 4.9
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient as AsyncMongoClient
+    except ImportError:
+        raise ImportError("app_alimentos_async necesita PyMongo >= 4.9 (AsyncMongoClient) "
+                          "o Motor >= 3.4 (pip install motor).") from None
+from pymongo.errors import BulkWriteError, OperationFailure
+
+import app_alimentos as sync
+from app_alimentos import (
+    MAX_DOCS_POR_LOTE,
+    TAMANO_LOTE_POR_DEFECTO,
+    cache_alimentos,
+    consulta_alergeno,
+    consulta_categoria,
+    consulta_micronutriente,
+    consulta_rango_calorias,
+    normalizar_proyeccion,
+    operacion_actualizar_calorias,
+    operacion_actualizar_campos,
+    operacion_agregar_o_actualizar_micronutriente,
+    operacion_eliminar_alimento,
+    operacion_eliminar_micronutriente,
+    proyeccion_campos,
+)
+
+# --- Cliente asíncrono compartido ---
+client_async = None
+collection_async = None
+
+
+async def get_collection_async():
+    """Devuelve la colección asíncrona, creando el cliente compartido la primera vez."""
+    global client_async, collection_async
+    if collection_async is not None:
+        return collection_async
+    try:
+        conexion = sync.conexion_global
+        client_async = AsyncMongoClient(conexion.uri, **conexion.opciones)
+        collection = client_async[conexion.db_name][conexion.collection_name]
+        await asegurar_indices_async(collection)
+    except Exception as e:
+        sync.logger.error("Error al conectar a MongoDB (async): %s", e)
+        await cerrar_conexion_async()
+        return None
+    collection_async = collection
+    return collection_async
+
+
+async def asegurar_indices_async(collection):
+    """Como sync.asegurar_indices: registra los índices que el servidor rechaza y propaga los errores de conexión."""
+    creados = []
+    for indice in sync.INDICES_ALIMENTOS:
+        try:
+            creados.extend(await collection.create_indexes([indice["modelo"]]))
+        except OperationFailure as e:
+            sync.logger.error("Error al crear el índice '%s' (async): %s", indice["modelo"].document["name"], e)
+    return creados
+
+
+async def cerrar_conexion_async():
+    """Cierra el cliente asíncrono compartido."""
+    global client_async, collection_async
+    cliente, client_async, collection_async = client_async, None, None
+    if cliente is not None:
+        cerrado = cliente.close()  # corrutina en AsyncMongoClient, síncrono en Motor
+        if inspect.isawaitable(cerrado):
+            await cerrado
+
+
+# 1. CREATE
+async def crear_alimento(alimento):
+    """Inserta un nuevo documento de alimento y devuelve su _id."""
+    collection = await get_collection_async()
+    if collection is None:
+        return None
+    documento = dict(alimento)
+    documento.setdefault("fecha_creacion", datetime.now())
+    documento.update(sync.claves_de_busqueda(documento))
+    result = await collection.insert_one(documento)
+    cache_alimentos.invalidar(documento.get("nombre"))
+    return result.inserted_id
+
+
+async def crear_varios_alimentos(alimentos_list):
+    """Inserta muchos alimentos en lotes desordenados y devuelve los _id insertados."""
+    collection = await get_collection_async()
+    if collection is None:
+        return None
+    ids = []
+    for lote in sync._lotes_de_alimentos(alimentos_list, MAX_DOCS_POR_LOTE, sync.MAX_BYTES_POR_LOTE):
+        fallidos = set()
+        try:
+            await collection.insert_many(lote, ordered=False)
+        except BulkWriteError as e:
+            fallidos = {error["index"] for error in e.details.get("writeErrors", [])}
+        for documento in lote:
+            cache_alimentos.invalidar(documento.get("nombre"))
+        ids.extend(doc["_id"] for i, doc in enumerate(lote) if i not in fallidos)
+    return ids
+
+
+# 2. READ
+async def iterar_alimentos(query=None, projection=None, batch_size=TAMANO_LOTE_POR_DEFECTO):
+    """Genera de forma asíncrona los alimentos que cumplen la consulta, lote a lote."""
+    collection = await get_collection_async()
+    if collection is None:
+        return
+    cursor = collection.find(query or {}, projection, batch_size=batch_size)
+    try:
+        async for alimento in cursor:
+            yield alimento
+    finally:
+        await cursor.close()
+
+
+async def _listar(query=None, projection=None):
+    return [alimento async for alimento in iterar_alimentos(query, normalizar_proyeccion(projection))]
+
+
+async def leer_todos_alimentos(projection=None):
+    """Devuelve todos los documentos de la colección."""
+    return await _listar(None, projection)
+
+
+async def buscar_por_nombre(nombre_alimento, projection=None):
+    """Busca un alimento por su nombre exacto, pasando por la caché compartida."""
+    if projection is not None:
+        collection = await get_collection_async()
+        if collection is None:
+            return None
+        return await collection.find_one({"nombre": nombre_alimento}, normalizar_proyeccion(projection))
+    generacion = cache_alimentos.generacion()
+    encontrado, alimento = cache_alimentos.obtener(nombre_alimento)
+    if encontrado:
+        return alimento
+    collection = await get_collection_async()
+    if collection is None:
+        return None
+    alimento = await collection.find_one({"nombre": nombre_alimento})
+    cache_alimentos.guardar(nombre_alimento, alimento, generacion)
+    return alimento
+
+
+async def buscar_varios_por_nombre(nombres):
+    """Busca muchos nombres en paralelo con asyncio.gather; devuelve {nombre: alimento}."""
+    alimentos = await asyncio.gather(*(buscar_por_nombre(nombre) for nombre in nombres))
+    return dict(zip(nombres, alimentos))
+
+
+async def buscar_por_rango_calorias(min_calorias, max_calorias, projection=None):
+    """Busca alimentos con porciones dentro de un rango de calorías."""
+    return await _listar(consulta_rango_calorias(min_calorias, max_calorias), projection)
+
+
+async def buscar_por_categoria_y_proyectar(categoria, campos_a_proyectar):
+    """Busca alimentos por categoría devolviendo solo los campos especificados."""
+    return await _listar(consulta_categoria(categoria), proyeccion_campos(campos_a_proyectar))
+
+
+async def buscar_alimentos_con_micronutriente(nombre_micronutriente, projection=None):
+    """Busca alimentos que contengan un micronutriente específico."""
+    return await _listar(consulta_micronutriente(nombre_micronutriente), projection)
+
+
+async def buscar_por_alergenos(alergia, projection=None):
+    """Busca alimentos que contengan un alergeno específico."""
+    return await _listar(consulta_alergeno(alergia), projection)
+
+
+# 3. UPDATE
+async def _escribir_una(nombre_alimento, operacion):
+    """Como app_alimentos._escribir_una: devuelve UpdateResult/DeleteResult y lanza WriteError."""
+    collection = await get_collection_async()
+    if collection is None:
+        return None
+    try:
+        result = await collection.bulk_write([operacion])
+    except BulkWriteError as e:
+        raise sync._error_de_una(e) from e
+    cache_alimentos.invalidar(nombre_alimento)
+    return sync._resultado_de_una(operacion, result)
+
+
+async def actualizar_calorias_por_nombre(nombre_alimento, nueva_caloria_por_unidad, unidad_porciones="unidad"):
+    """Actualiza las calorías de una porción específica de un alimento."""
+    return await _escribir_una(nombre_alimento, operacion_actualizar_calorias(
+        nombre_alimento, nueva_caloria_por_unidad, unidad_porciones))
+
+
+async def agregar_o_actualizar_micronutriente(nombre_alimento, nombre_micronutriente, cantidad_mg):
+    """Agrega o actualiza un micronutriente en una sola operación atómica."""
+    return await _escribir_una(nombre_alimento, operacion_agregar_o_actualizar_micronutriente(
+        nombre_alimento, nombre_micronutriente, cantidad_mg))
+
+
+async def actualizar_campo_directo(nombre_alimento, campo, nuevo_valor):
+    """Actualiza un campo directo (o con notación de punto) de un alimento."""
+    result = await _escribir_una(nombre_alimento, operacion_actualizar_campos(nombre_alimento, {campo: nuevo_valor}))
+    if campo == "nombre":
+        cache_alimentos.invalidar(nuevo_valor)
+    return result
+
+
+# 4. DELETE
+async def eliminar_alimento_por_nombre(nombre_alimento):
+    """Elimina un alimento por su nombre."""
+    return await _escribir_una(nombre_alimento, operacion_eliminar_alimento(nombre_alimento))
+
+
+async def eliminar_alimentos_por_categoria(categoria):
+    """Elimina todos los alimentos de una categoría específica."""
+    collection = await get_collection_async()
+    if collection is None:
+        return None
+    result = await collection.delete_many(consulta_categoria(categoria))
+    cache_alimentos.invalidar()
+    return result
+
+
+async def eliminar_micronutriente_de_alimento(nombre_alimento, nombre_micronutriente):
+    """Elimina un micronutriente específico del array de un alimento."""
+    return await _escribir_una(nombre_alimento, operacion_eliminar_micronutriente(
+        nombre_alimento, nombre_micronutriente))
+
+
+# --- Benchmark: async vs. síncrono con hilos ---
+def _medir_sync(nombres, concurrencia):
+    collection = sync.get_collection()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        list(executor.map(lambda nombre: collection.find_one({"nombre": nombre}), nombres))
+    return time.perf_counter() - inicio
+
+
+async def _medir_async(nombres, concurrencia):
+    collection = await get_collection_async()
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def buscar(nombre):
+        async with semaforo:
+            return await collection.find_one({"nombre": nombre})
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(buscar(nombre) for nombre in nombres))
+    return time.perf_counter() - inicio
+
+
+async def benchmark_async_vs_sync(nombres, concurrencias=(1, 10, 100)):
+    """Compara búsquedas por nombre async (gather) contra síncronas (un hilo por petición).
+
+    Ambas rutas consultan directamente la colección, sin caché, para medir solo el
+    acceso a la base. Devuelve una fila por nivel de concurrencia con búsquedas por segundo.
+    """
+    resultados = []
+    for concurrencia in concurrencias:
+        segundos_sync = _medir_sync(nombres, concurrencia)
+        segundos_async = await _medir_async(nombres, concurrencia)
+        resultados.append({
+            "concurrencia": concurrencia,
+            "busquedas": len(nombres),
+            "sync_por_segundo": len(nombres) / segundos_sync if segundos_sync else 0.0,
+            "async_por_segundo": len(nombres) / segundos_async if segundos_async else 0.0,
+        })
+    return resultados
+
+
+async def _main():
+    collection = sync.get_collection()
+    if collection is None:
+        return
+    nombres = [doc["nombre"] for doc in collection.find({}, {"nombre": 1, "_id": 0}).limit(1000)]
+    for fila in await benchmark_async_vs_sync(nombres):
+        print(f"Concurrencia {fila['concurrencia']:>3}: sync {fila['sync_por_segundo']:.0f} búsquedas/s, "
+              f"async {fila['async_por_segundo']:.0f} búsquedas/s")
+    await cerrar_conexion_async()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,210 @@
+"""Benchmark de las operaciones CRUD de app_alimentos.py contra una base local.
+
+Apunta las funciones existentes a un mongod local (por URI) o a una base en memoria
+(mongomock, si está instalado), la llena con alimentos sintéticos con la misma forma
+que los reales y mide cada operación: latencia p50/p99, operaciones por segundo y
+memoria pico. El resultado se imprime (o guarda) como JSON para comparar corridas.
+
+Uso:
+    python benchmark_alimentos.py --escala 1000 --escala 100000 --destino mongodb://localhost:27017/
+    python benchmark_alimentos.py --destino memoria --salida bench.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import app_alimentos as A
+
+DB_BENCHMARK = "benchmark_alimentos"
+CATEGORIAS = ["Fruta", "Vegetal", "Proteína", "Lácteo", "Cereal", "Snack", "Bebida", "Dulce"]
+ALERGENOS = ["gluten", "lactosa", "frutos secos", "huevo", "soya", "mariscos"]
+MICRONUTRIENTES = ["Hierro", "Calcio", "Potasio", "Vitamina A", "Vitamina C", "Vitamina K", "Zinc"]
+UNIDADES = ["unidad", "100g", "taza", "porción"]
+
+# Operaciones que mongomock no puede ejecutar (array_filters, $mergeObjects en pipelines):
+# con --destino memoria se omiten en lugar de publicar latencias de ejecuciones fallidas.
+NO_SOPORTADAS_EN_MEMORIA = {"actualizar_calorias_por_nombre", "agregar_o_actualizar_micronutriente"}
+
+
+def generar_alimento(i, rng):
+    """Crea un alimento sintético con la forma de los documentos reales."""
+    porciones = [
+        {"unidad": unidad, "cantidad": 1, "gramos": rng.randint(10, 300), "calorias": rng.randint(5, 800)}
+        for unidad in rng.sample(UNIDADES, rng.randint(1, 3))
+    ]
+    return {
+        "nombre": f"Alimento Sintético {i:07d}",
+        "categoria": rng.choice(CATEGORIAS),
+        "porciones": porciones,
+        "macros": {
+            "proteinas_g": round(rng.uniform(0, 40), 1),
+            "carbohidratos_g": round(rng.uniform(0, 80), 1),
+            "grasas_g": round(rng.uniform(0, 30), 1),
+        },
+        "micronutrientes": [
+            {"nombre": nombre, "cantidad_mg": round(rng.uniform(0.01, 200), 2)}
+            for nombre in rng.sample(MICRONUTRIENTES, rng.randint(0, 4))
+        ],
+        "fibra_g": round(rng.uniform(0, 15), 1),
+        "azucar_g": round(rng.uniform(0, 50), 1),
+        "alergenos": rng.sample(ALERGENOS, rng.randint(0, 2)),
+    }
+
+
+def generar_alimentos(cantidad, semilla=0, desde=0):
+    """Genera `cantidad` alimentos sintéticos reproducibles (sin tenerlos todos en memoria)."""
+    rng = random.Random(semilla)
+    for i in range(desde, desde + cantidad):
+        yield generar_alimento(i, rng)
+
+
+def preparar_coleccion(destino):
+    """Apunta app_alimentos a la base de benchmark ("memoria" o una URI) y la deja vacía."""
+    if destino == "memoria":
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("El destino 'memoria' requiere mongomock (pip install mongomock).")
+        cliente = mongomock.MongoClient()
+    else:
+        cliente = A.MongoClient(destino)
+    collection = cliente[DB_BENCHMARK][A.COLLECTION_NAME]
+    collection.drop()
+    A.asegurar_indices(collection)
+    A.client_global = cliente
+    A.collection_global = collection
+    A.cache_alimentos.invalidar()
+    return collection
+
+
+def _percentil(valores_ordenados, q):
+    return valores_ordenados[min(len(valores_ordenados) - 1, round(q * (len(valores_ordenados) - 1)))]
+
+
+def medir(preparar, ejecutar, repeticiones):
+    """Mide `ejecutar(*preparar())` `repeticiones` veces; la preparación no se cronometra.
+
+    La memoria pico se mide en una ejecución adicional con tracemalloc, para que su
+    costo no distorsione las latencias. Si alguna repetición falla, el resultado se
+    marca como no válido y no incluye latencias.
+    """
+    latencias, errores = [], []
+    for _ in range(repeticiones):
+        argumentos = preparar()
+        inicio = time.perf_counter()
+        try:
+            ejecutar(*argumentos)
+        except Exception as e:
+            errores.append(f"{type(e).__name__}: {e}")
+            continue
+        latencias.append(time.perf_counter() - inicio)
+
+    argumentos = preparar()
+    tracemalloc.start()
+    try:
+        ejecutar(*argumentos)
+    except Exception:
+        pass
+    memoria_pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    resultado = {"valido": not errores, "repeticiones": len(latencias), "errores": len(errores),
+                 "memoria_pico_kb": round(memoria_pico / 1024, 1)}
+    if errores:
+        resultado["primer_error"] = errores[0]
+    elif latencias:
+        ordenadas = sorted(latencias)
+        resultado.update({
+            "p50_ms": round(1000 * _percentil(ordenadas, 0.50), 3),
+            "p99_ms": round(1000 * _percentil(ordenadas, 0.99), 3),
+            "media_ms": round(1000 * sum(latencias) / len(latencias), 3),
+            "ops_por_segundo": round(len(latencias) / sum(latencias), 1) if sum(latencias) else None,
+        })
+    return resultado
+
+
+def operaciones(escala, rng):
+    """Define cada operación medida como (preparar, ejecutar)."""
+    existentes = lambda: (f"Alimento Sintético {rng.randrange(escala):07d}",)
+    contador = iter(range(escala, 10 ** 12))
+
+    def nuevo():
+        return generar_alimento(next(contador), rng)
+
+    def insertar_para_eliminar():
+        alimento = nuevo()
+        A.collection_global.insert_one(alimento)
+        return (alimento["nombre"],)
+
+    def insertar_categoria_para_eliminar():
+        categoria = f"Benchmark {next(contador)}"
+        A.collection_global.insert_many([dict(nuevo(), categoria=categoria) for _ in range(10)])
+        return (categoria,)
+
+    def buscar_sin_cache(nombre):
+        A.cache_alimentos.invalidar(nombre)
+        return A.buscar_por_nombre(nombre)
+
+    return {
+        "crear_alimento": (lambda: (nuevo(),), A.crear_alimento),
+        "crear_varios_alimentos_100": (lambda: ([nuevo() for _ in range(100)],), A.crear_varios_alimentos),
+        "buscar_por_nombre": (existentes, buscar_sin_cache),
+        "buscar_por_nombre_con_cache": (existentes, A.buscar_por_nombre),
+        "buscar_por_rango_calorias": (lambda: (100, 105), A.buscar_por_rango_calorias),
+        "iterar_por_rango_calorias": (lambda: (100, 105), lambda a, b: sum(1 for _ in A.iterar_por_rango_calorias(a, b))),
+        "buscar_por_alergenos": (lambda: (rng.choice(ALERGENOS),), A.buscar_por_alergenos),
+        "paginar_todos_alimentos": (lambda: (), lambda: A.paginar_todos_alimentos(tamano_pagina=50)),
+        "actualizar_calorias_por_nombre": (lambda: existentes() + (rng.randint(5, 800), "unidad"), A.actualizar_calorias_por_nombre),
+        "actualizar_campo_directo": (lambda: existentes() + ("fibra_g", rng.uniform(0, 15)), A.actualizar_campo_directo),
+        "actualizar_campos_en_lote_100": (
+            lambda: ([(existentes()[0], {"azucar_g": rng.uniform(0, 50)}) for _ in range(100)],),
+            lambda cambios: A.actualizar_campos_en_lote(cambios)),
+        "agregar_o_actualizar_micronutriente": (lambda: existentes() + ("Zinc", rng.uniform(0, 20)), A.agregar_o_actualizar_micronutriente),
+        "eliminar_micronutriente_de_alimento": (lambda: existentes() + ("Zinc",), A.eliminar_micronutriente_de_alimento),
+        "eliminar_alimento_por_nombre": (insertar_para_eliminar, A.eliminar_alimento_por_nombre),
+        "eliminar_alimentos_por_categoria_10": (insertar_categoria_para_eliminar, A.eliminar_alimentos_por_categoria),
+    }
+
+
+def ejecutar_benchmark(escala, destino="memoria", repeticiones=50, semilla=0):
+    """Llena la base con `escala` alimentos y mide cada operación. Devuelve un dict serializable."""
+    preparar_coleccion(destino)
+    inicio = time.perf_counter()
+    A.cargar_alimentos_masivo(generar_alimentos(escala, semilla))
+    resultado = {"escala": escala, "destino": destino, "repeticiones": repeticiones,
+                 "carga_inicial_s": round(time.perf_counter() - inicio, 2), "operaciones": {}}
+    rng = random.Random(semilla + 1)
+    for nombre, (preparar, ejecutar) in operaciones(escala, rng).items():
+        if destino == "memoria" and nombre in NO_SOPORTADAS_EN_MEMORIA:
+            resultado["operaciones"][nombre] = {"valido": False, "omitida": "no soportada por mongomock"}
+            continue
+        resultado["operaciones"][nombre] = medir(preparar, ejecutar, repeticiones)
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las operaciones CRUD de alimentos.")
+    parser.add_argument("--escala", type=int, action="append",
+                        help="Cantidad de alimentos sintéticos (repetible; por defecto 1000). Ej: 1000, 100000, 1000000")
+    parser.add_argument("--destino", default="memoria",
+                        help="'memoria' (mongomock) o la URI de un mongod local, ej. mongodb://localhost:27017/")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, la consola)")
+    args = parser.parse_args(argv)
+
+    resultados = [ejecutar_benchmark(escala, args.destino, args.repeticiones, args.semilla)
+                  for escala in args.escala or [1000]]
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Índice en memoria de nombres de alimentos para autocompletado y búsqueda aproximada.
+
+`IndiceNombres` mantiene los nombres normalizados (sin acentos, en minúsculas) en
+una lista ordenada, así un prefijo se resuelve con búsqueda binaria en
+microsegundos aun con un millón de nombres, y un índice de trigramas para
+encontrar nombres con errores de tipeo ("platno" -> "Plátano").
+
+Tiene la misma interfaz que las vistas de cambios_alimentos, de modo que un
+ConsumidorCambios lo mantiene al día con cada alta, cambio o baja:
+
+    indice = IndiceNombres()
+    consumidor = ConsumidorCambios()
+    consumidor.registrar_vista(indice)
+    consumidor.iniciar()
+    indice.autocompletar("pla")
+
+Sin change stream, `IndiceNombres.desde_coleccion()` lo carga una vez.
+"""
+import bisect
+import threading
+from collections import Counter, defaultdict
+
+from app_alimentos import iterar_alimentos, normalizar_texto
+
+UMBRAL_APROXIMADO = 0.3
+
+
+def trigramas(texto):
+    """Trigramas del texto normalizado, con bordes marcados ("pan" -> "  p", " pa", "pan", "an ")."""
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceNombres:
+    """Nombres ordenados por clave normalizada más un índice de trigramas."""
+
+    proyeccion = {"nombre": 1}
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ordenados = []  # (nombre normalizado, nombre), ordenado
+        self._por_id = {}  # _id -> nombre
+        self._trigramas = defaultdict(set)  # trigrama -> nombres
+        self._cantidad_trigramas = {}  # nombre -> cantidad de trigramas propios
+
+    @classmethod
+    def desde_coleccion(cls, query=None):
+        indice = cls()
+        indice.cargar_desde(iterar_alimentos(query, cls.proyeccion))
+        return indice
+
+    def __len__(self):
+        return len(self._ordenados)
+
+    def _agregar(self, _id, nombre, ordenar=True):
+        """Agrega un nombre; con `ordenar=False` lo deja al final de la lista (carga masiva)."""
+        self._quitar(_id)
+        if not isinstance(nombre, str):
+            return
+        entrada = (normalizar_texto(nombre), nombre)
+        if not ordenar:
+            self._ordenados.append(entrada)
+        else:
+            posicion = bisect.bisect_left(self._ordenados, entrada)
+            if posicion == len(self._ordenados) or self._ordenados[posicion] != entrada:
+                self._ordenados.insert(posicion, entrada)
+        propios = trigramas(entrada[0])
+        for trigrama in propios:
+            self._trigramas[trigrama].add(nombre)
+        self._cantidad_trigramas[nombre] = len(propios)
+        self._por_id[_id] = nombre
+
+    def _quitar(self, _id):
+        nombre = self._por_id.pop(_id, None)
+        if nombre is None:
+            return
+        entrada = (normalizar_texto(nombre), nombre)
+        posicion = bisect.bisect_left(self._ordenados, entrada)
+        if posicion < len(self._ordenados) and self._ordenados[posicion] == entrada:
+            del self._ordenados[posicion]
+        for trigrama in trigramas(entrada[0]):
+            nombres = self._trigramas.get(trigrama)
+            if nombres is not None:
+                nombres.discard(nombre)
+                if not nombres:
+                    del self._trigramas[trigrama]
+        self._cantidad_trigramas.pop(nombre, None)
+
+    # --- Interfaz de vista (cambios_alimentos) ---
+    def cargar_desde(self, documentos):
+        """Carga los nombres de los documentos (con _id y nombre).
+
+        Agrega todo al final y ordena una sola vez, en lugar de insertar cada nombre en
+        su posición (que costaría O(n) por nombre). Los _id repetidos se reemplazan.
+        """
+        with self._lock:
+            repetidos = False
+            for documento in documentos:
+                repetidos = repetidos or documento["_id"] in self._por_id
+                self._agregar(documento["_id"], documento.get("nombre"), ordenar=False)
+            if repetidos:
+                # _quitar buscó con bisect sobre una lista a medio ordenar: se reconstruye.
+                self._ordenados = [(normalizar_texto(nombre), nombre) for nombre in self._por_id.values()]
+            self._ordenados = sorted(set(self._ordenados))
+
+    def aplicar(self, eventos):
+        """Aplica un lote de eventos del change stream."""
+        with self._lock:
+            for evento in eventos:
+                _id = evento.get("documentKey", {}).get("_id")
+                if evento["operationType"] == "delete":
+                    self._quitar(_id)
+                elif evento.get("fullDocument") is not None:
+                    self._agregar(_id, evento["fullDocument"].get("nombre"))
+
+    # --- Búsquedas ---
+    def autocompletar(self, prefijo, limite=10):
+        """Nombres que empiezan con `prefijo` (sin importar acentos ni mayúsculas), en orden alfabético."""
+        clave = normalizar_texto(prefijo)
+        with self._lock:
+            posicion = bisect.bisect_left(self._ordenados, (clave,))
+            resultado = []
+            for normalizado, nombre in self._ordenados[posicion:posicion + limite]:
+                if not normalizado.startswith(clave):
+                    break
+                resultado.append(nombre)
+            return resultado
+
+    def buscar_aproximado(self, texto, limite=10, umbral=UMBRAL_APROXIMADO):
+        """Nombres parecidos a `texto` por similitud de trigramas (coeficiente de Dice).
+
+        Devuelve [(nombre, puntaje)] de mayor a menor puntaje, con puntaje >= `umbral`.
+        """
+        consulta = trigramas(normalizar_texto(texto))
+        with self._lock:
+            coincidencias = Counter()
+            for trigrama in consulta:
+                coincidencias.update(self._trigramas.get(trigrama, ()))
+            puntajes = []
+            for nombre, comunes in coincidencias.items():
+                puntaje = 2 * comunes / (len(consulta) + self._cantidad_trigramas[nombre])
+                if puntaje >= umbral:
+                    puntajes.append((nombre, round(puntaje, 3)))
+        puntajes.sort(key=lambda par: (-par[1], par[0]))
+        return puntajes[:limite]
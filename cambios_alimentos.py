@@ -0,0 +1,206 @@
+"""Consumidor del change stream de la colección para mantener vistas derivadas.
+
+`ConsumidorCambios` escucha los cambios de la colección de alimentos y los entrega
+en lotes a los manejadores registrados por tipo de operación (insert, update,
+replace, delete) y a las vistas registradas. Después de procesar cada lote guarda
+el resume token, de modo que al reiniciar tras una caída continúa donde quedó
+(entrega al menos una vez: los manejadores deben tolerar ver un evento repetido).
+
+`EstadisticasCaloriasPorCategoria` es una vista que se mantiene sola: guarda el
+aporte de cada alimento (categoría y calorías promedio de sus porciones) y con
+cada evento resta el aporte anterior y suma el nuevo, sin volver a recorrer la
+colección. Requiere un replica set (en local alcanza uno de un solo nodo).
+
+    consumidor = ConsumidorCambios(almacen_token=AlmacenTokenArchivo("cambios.token"))
+    vista = consumidor.registrar_vista(EstadisticasCaloriasPorCategoria())
+    consumidor.iniciar()
+    ...
+    vista.resumen()
+"""
+import os
+import threading
+from collections import defaultdict
+
+from bson import json_util
+
+from app_alimentos import get_collection, logger
+
+TIPOS_DE_OPERACION = ("insert", "update", "replace", "delete")
+TAMANO_LOTE_EVENTOS = 100
+ESPERA_MAXIMA_MS = 500
+
+
+class AlmacenTokenArchivo:
+    """Guarda el resume token en un archivo, reemplazándolo de forma atómica."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def cargar(self):
+        try:
+            with open(self.ruta, encoding="utf-8") as archivo:
+                return json_util.loads(archivo.read())
+        except FileNotFoundError:
+            return None
+
+    def guardar(self, token):
+        temporal = f"{self.ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(json_util.dumps(token))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta)
+
+
+class EstadisticasCaloriasPorCategoria:
+    """Cantidad y calorías promedio por categoría, mantenidas de forma incremental."""
+
+    proyeccion = {"categoria": 1, "porciones.calorias": 1}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aportes = {}  # _id -> (categoria, calorias promedio o None)
+        self._totales = defaultdict(lambda: [0, 0.0, 0])  # categoria -> [cantidad, suma, con_calorias]
+
+    @staticmethod
+    def _aporte(documento):
+        calorias = [p["calorias"] for p in documento.get("porciones") or []
+                    if isinstance(p.get("calorias"), (int, float))]
+        return documento.get("categoria"), sum(calorias) / len(calorias) if calorias else None
+
+    def _sumar(self, aporte, signo):
+        categoria, calorias = aporte
+        fila = self._totales[categoria]
+        fila[0] += signo
+        if calorias is not None:
+            fila[1] += signo * calorias
+            fila[2] += signo
+        if fila[0] == 0:
+            del self._totales[categoria]
+
+    def _reemplazar(self, _id, documento):
+        anterior = self._aportes.pop(_id, None)
+        if anterior is not None:
+            self._sumar(anterior, -1)
+        if documento is not None:
+            self._aportes[_id] = self._aporte(documento)
+            self._sumar(self._aportes[_id], 1)
+
+    def cargar_desde(self, documentos):
+        """Carga inicial a partir de documentos (con al menos `proyeccion`)."""
+        with self._lock:
+            for documento in documentos:
+                self._reemplazar(documento["_id"], documento)
+
+    def aplicar(self, eventos):
+        """Aplica un lote de eventos del change stream (idempotente por _id)."""
+        with self._lock:
+            for evento in eventos:
+                _id = evento.get("documentKey", {}).get("_id")
+                if evento["operationType"] == "delete":
+                    self._reemplazar(_id, None)
+                elif evento.get("fullDocument") is not None:
+                    # Sin fullDocument, updateLookup no encontró el documento: ya llegará su delete.
+                    self._reemplazar(_id, evento["fullDocument"])
+
+    def resumen(self):
+        """Devuelve {categoria: {"cantidad", "calorias_promedio"}}."""
+        with self._lock:
+            return {categoria: {"cantidad": cantidad,
+                                "calorias_promedio": suma / con_calorias if con_calorias else None}
+                    for categoria, (cantidad, suma, con_calorias) in self._totales.items()}
+
+
+class ConsumidorCambios:
+    """Entrega los cambios de la colección, en lotes, a manejadores y vistas."""
+
+    def __init__(self, collection=None, almacen_token=None, tamano_lote=TAMANO_LOTE_EVENTOS,
+                 espera_maxima_ms=ESPERA_MAXIMA_MS):
+        self.collection = collection
+        self.almacen_token = almacen_token
+        self.tamano_lote = tamano_lote
+        self.espera_maxima_ms = espera_maxima_ms
+        self._manejadores = {tipo: [] for tipo in TIPOS_DE_OPERACION}
+        self._vistas = []
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def registrar(self, tipo, manejador):
+        """Registra `manejador(eventos)` para un tipo de operación; recibe listas de eventos."""
+        if tipo not in self._manejadores:
+            raise ValueError(f"Tipo de operación desconocido: {tipo!r}")
+        self._manejadores[tipo].append(manejador)
+        return manejador
+
+    def registrar_vista(self, vista):
+        """Registra una vista con `aplicar(eventos)` y, opcionalmente, `cargar_desde(documentos)`."""
+        self._vistas.append(vista)
+        return vista
+
+    def procesar_eventos(self, eventos):
+        """Entrega un lote: las vistas lo reciben entero y los manejadores por tramos del mismo tipo, en orden."""
+        for vista in self._vistas:
+            vista.aplicar(eventos)
+        inicio = 0
+        for i in range(1, len(eventos) + 1):
+            if i == len(eventos) or eventos[i]["operationType"] != eventos[inicio]["operationType"]:
+                for manejador in self._manejadores.get(eventos[inicio]["operationType"], []):
+                    manejador(eventos[inicio:i])
+                inicio = i
+
+    def _cargar_vistas(self, collection):
+        for vista in self._vistas:
+            if hasattr(vista, "cargar_desde"):
+                vista.cargar_desde(collection.find({}, getattr(vista, "proyeccion", None)))
+
+    def ejecutar(self):
+        """Escucha el change stream hasta que se llame a detener() o el stream se cierre. Bloquea el hilo actual."""
+        collection = self.collection if self.collection is not None else get_collection()
+        if collection is None:
+            return
+        token = self.almacen_token.cargar() if self.almacen_token else None
+        with collection.watch(full_document="updateLookup", resume_after=token,
+                              max_await_time_ms=self.espera_maxima_ms) as stream:
+            # Las vistas viven en memoria: se cargan al arrancar, con el stream ya abierto,
+            # así lo que cambie durante la carga llega después como evento.
+            self._cargar_vistas(collection)
+            lote = []
+            while not self._detener.is_set() and stream.alive:
+                evento = stream.try_next()
+                if evento is not None:
+                    lote.append(evento)
+                if lote and (evento is None or len(lote) >= self.tamano_lote):
+                    self._entregar(lote, stream)
+                    lote = []
+            # Lo leído antes de salir también se entrega (y su token se guarda).
+            if lote:
+                self._entregar(lote, stream)
+            if self._detener.is_set():
+                logger.info("Consumidor de cambios detenido a pedido.")
+            else:
+                logger.warning("El change stream se cerró (invalidate: colección eliminada o renombrada).")
+
+    def _entregar(self, lote, stream):
+        """Procesa un lote y guarda el resume token que lo cubre."""
+        self.procesar_eventos(lote)
+        if self.almacen_token:
+            self.almacen_token.guardar(stream.resume_token)
+
+    def iniciar(self):
+        """Ejecuta el consumidor en un hilo de fondo y lo devuelve."""
+        def correr():
+            try:
+                self.ejecutar()
+            except Exception as e:
+                logger.error("Consumidor de cambios detenido: %s", e)
+
+        self._detener.clear()
+        self._hilo = threading.Thread(target=correr, name="consumidor-cambios-alimentos", daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def detener(self, espera=None):
+        """Pide al consumidor que termine (tras el lote en curso) y espera al hilo."""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(espera)
@@ -0,0 +1,345 @@
+"""Línea de comandos no interactiva para operar la colección de alimentos.
+
+Subcomandos:
+    importar ARCHIVO      carga un .json (array) o .ndjson por el camino masivo, en streaming
+    exportar              escribe los alimentos (o los que cumplan --filtro) como NDJSON
+    consultar TIPO VALOR  nombre, prefijo, texto, calorias MIN MAX, categoria, micronutriente,
+                          alergeno o todos; el resultado sale como NDJSON
+    actualizar            un campo de un alimento, o muchos cambios desde un .ndjson
+    bench                 corre benchmark_alimentos con los argumentos que siguen
+    lote ARCHIVO          ejecuta un subcomando por línea ("-" = stdin) con una sola conexión
+
+PyMongo y app_alimentos se importan recién dentro de cada subcomando, y el cliente se
+crea con la primera operación, así `--help` y los errores de argumentos responden al
+instante. La salida de datos va a stdout y los mensajes del logger "alimentos" a stderr.
+
+    python cli_alimentos.py importar catalogo.ndjson --lote 2000
+    python cli_alimentos.py consultar prefijo pla --limite 5
+    python cli_alimentos.py lote operaciones.txt
+"""
+import argparse
+import json
+import logging
+import os
+import shlex
+import sys
+
+TIPOS_DE_CONSULTA = ["nombre", "prefijo", "texto", "calorias", "categoria", "micronutriente", "alergeno", "todos"]
+TAMANO_BLOQUE_LECTURA = 1 << 16
+
+
+def _app():
+    """Importa app_alimentos (y con él PyMongo) solo cuando un subcomando lo necesita."""
+    import app_alimentos
+    return app_alimentos
+
+
+def _json_util():
+    from bson import json_util
+    return json_util
+
+
+def _escribir(documento, salida=None):
+    (salida or sys.stdout).write(_json_util().dumps(documento, ensure_ascii=False) + "\n")
+
+
+def _abrir(ruta, modo="rt"):
+    """Abre un archivo de texto (comprimido si termina en .gz); "-" es stdin/stdout."""
+    if ruta == "-":
+        return sys.stdin if "r" in modo else sys.stdout
+    if ruta.endswith(".gz"):
+        import gzip
+        return gzip.open(ruta, modo, encoding="utf-8")
+    return open(ruta, modo, encoding="utf-8")
+
+
+# --- Lectura en streaming ---
+def leer_ndjson(archivo):
+    """Genera un documento por línea (Extended JSON, ignora líneas vacías)."""
+    json_util = _json_util()
+    for numero, linea in enumerate(archivo, 1):
+        if linea.strip():
+            try:
+                yield json_util.loads(linea)
+            except ValueError as e:
+                raise ValueError(f"Línea {numero}: {e}") from None
+
+
+def leer_arreglo_json(archivo):
+    """Genera los elementos de un array JSON sin cargar el archivo entero en memoria.
+
+    Exige la sintaxis de JSON: los elementos van separados por exactamente una coma
+    (rechaza "[1 2]", "[1,,2]" y "[1,]").
+    """
+    json_util = _json_util()
+    decodificador = json.JSONDecoder(object_hook=json_util.object_hook)
+    bufer, posicion, fin_de_archivo = "", 0, False
+    estado = "apertura"  # apertura -> primero -> separador <-> elemento
+    while True:
+        while posicion < len(bufer) and bufer[posicion].isspace():
+            posicion += 1
+        if posicion < len(bufer):
+            caracter = bufer[posicion]
+            if estado == "apertura":
+                if caracter != "[":
+                    raise ValueError("Se esperaba un array JSON ('[' al inicio).")
+                estado, posicion = "primero", posicion + 1
+                continue
+            if caracter == "]" and estado in ("primero", "separador"):
+                return
+            if estado == "separador":
+                if caracter != ",":
+                    raise ValueError("Se esperaba ',' o ']' después de un elemento del array JSON.")
+                estado, posicion = "elemento", posicion + 1
+                continue
+            try:
+                elemento, fin = decodificador.raw_decode(bufer, posicion)
+            except json.JSONDecodeError as e:
+                if fin_de_archivo:
+                    # La posición de `e` es relativa al búfer, no al archivo: no se informa.
+                    raise ValueError(f"Elemento inválido en el array JSON: {e.msg}.") from None
+            else:
+                # Si el elemento llega hasta el final del búfer puede estar cortado ("12" de "1234").
+                if fin < len(bufer) or fin_de_archivo:
+                    estado, posicion = "separador", fin
+                    yield elemento
+                    continue
+        elif fin_de_archivo:
+            if estado == "apertura":
+                raise ValueError("Se esperaba un array JSON ('[' al inicio).")
+            raise ValueError("El array JSON no está cerrado.")
+        bloque = archivo.read(TAMANO_BLOQUE_LECTURA)
+        fin_de_archivo = not bloque
+        bufer, posicion = bufer[posicion:] + bloque, 0
+
+
+def leer_documentos(archivo, formato):
+    if formato == "json":
+        return leer_arreglo_json(archivo)
+    return leer_ndjson(archivo)
+
+
+def _formato_de(ruta, formato):
+    if formato != "auto":
+        return formato
+    return "json" if ruta.removesuffix(".gz").endswith(".json") else "ndjson"
+
+
+def _valor(texto):
+    """Interpreta un valor de la línea de comandos como JSON si puede ("12.5", "true", "[1]")."""
+    try:
+        return _json_util().loads(texto)
+    except ValueError:
+        return texto
+
+
+def _filtro_json(texto):
+    """Tipo de argparse para --filtro: un objeto JSON (Extended JSON), o error de uso."""
+    try:
+        filtro = _json_util().loads(texto)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"el filtro no es JSON válido: {e}") from None
+    if not isinstance(filtro, dict):
+        raise argparse.ArgumentTypeError("el filtro debe ser un objeto JSON, ej. '{\"categoria\": \"Fruta\"}'")
+    return filtro
+
+
+def _campos(texto):
+    return [campo.strip() for campo in texto.split(",") if campo.strip()] if texto else None
+
+
+# --- Subcomandos ---
+def cmd_importar(args):
+    A = _app()
+    with _abrir(args.archivo) as archivo:
+        resumen = A.cargar_alimentos_masivo(leer_documentos(archivo, _formato_de(args.archivo, args.formato)),
+                                            max_docs_por_lote=args.lote)
+    _escribir(resumen)
+    return 0 if not resumen["fallidos"] else 1
+
+
+def cmd_exportar(args):
+    A = _app()
+    salida = _abrir(args.salida, "wt")
+    try:
+        cantidad = 0
+        for alimento in A.iterar_alimentos(args.filtro, _campos(args.campos), batch_size=args.lote):
+            _escribir(alimento, salida)
+            cantidad += 1
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    A.logger.info("Exportados %d alimentos.", cantidad)
+    return 0
+
+
+def cmd_consultar(args):
+    campos = _campos(args.campos)
+    valores = args.valores
+    tipo = args.tipo
+    esperados = {"calorias": 2, "todos": 0}.get(tipo, 1)
+    if len(valores) != esperados:
+        raise SystemExit(f"'consultar {tipo}' espera {esperados} valor(es), recibió {len(valores)}.")
+    if tipo == "calorias":
+        try:
+            valores = [float(valor) for valor in valores]
+        except ValueError:
+            raise SystemExit(f"'consultar calorias' espera dos números, recibió {' '.join(args.valores)}.") from None
+    A = _app()
+    if tipo == "nombre":
+        resultado = A.buscar_por_nombre(valores[0], campos)
+        resultados = [resultado] if resultado else []
+    elif tipo == "prefijo":
+        resultados = A.buscar_por_prefijo(valores[0], args.limite or 10, projection=campos)
+    elif tipo == "texto":
+        resultados = A.buscar_por_texto(valores[0], args.limite or 20, projection=campos)
+    else:
+        iteradores = {
+            "calorias": lambda: A.iterar_por_rango_calorias(valores[0], valores[1], projection=campos),
+            "categoria": lambda: A.iterar_alimentos(A.consulta_categoria(valores[0]), campos),
+            "micronutriente": lambda: A.iterar_alimentos_con_micronutriente(valores[0], projection=campos),
+            "alergeno": lambda: A.iterar_por_alergenos(valores[0], projection=campos),
+            "todos": lambda: A.iterar_todos_alimentos(projection=campos),
+        }
+        resultados = iteradores[tipo]()
+    for cantidad, documento in enumerate(resultados, 1):
+        _escribir(documento)
+        if args.limite and cantidad >= args.limite:
+            break
+    return 0
+
+
+def cmd_actualizar(args):
+    A = _app()
+    if args.archivo:
+        # Cada línea: {"nombre": "...", "campos": {"campo": valor, ...}}
+        with _abrir(args.archivo) as archivo:
+            cambios = ((cambio["nombre"], cambio["campos"]) for cambio in leer_ndjson(archivo))
+            resumen = A.actualizar_campos_en_lote(cambios, tamano_lote=args.lote)
+        _escribir(resumen)
+        return 0 if not resumen["fallidos"] else 1
+    if not (args.nombre and args.campo and args.valor is not None):
+        raise SystemExit("'actualizar' necesita NOMBRE CAMPO VALOR o --archivo.")
+    result = A.actualizar_campo_directo(args.nombre, args.campo, _valor(args.valor))
+    if result is None:
+        return 1
+    _escribir({"coincidentes": result.matched_count, "modificados": result.modified_count})
+    return 0 if result.matched_count else 1
+
+
+def cmd_bench(args):
+    """Corre el benchmark y después devuelve app_alimentos a la conexión que tenía.
+
+    El benchmark apunta los globales de app_alimentos a su propia base (mongomock o
+    la de --destino); sin restaurarlos, las líneas siguientes de un `lote` leerían y
+    escribirían en esa base descartable.
+    """
+    import benchmark_alimentos
+    A = _app()
+    argumentos = args.argumentos[1:] if args.argumentos[:1] == ["--"] else args.argumentos
+    cliente, coleccion = A.client_global, A.collection_global
+    try:
+        benchmark_alimentos.main(argumentos)
+    finally:
+        if A.client_global is not None and A.client_global is not cliente:
+            A.client_global.close()
+        A.client_global, A.collection_global = cliente, coleccion
+        A.cache_alimentos.invalidar()
+    return 0
+
+
+def cmd_lote(args):
+    """Ejecuta un subcomando por línea; la conexión se abre una vez y se reutiliza."""
+    parser = construir_parser()
+    codigo = 0
+    with _abrir(args.archivo) as archivo:
+        for numero, linea in enumerate(archivo, 1):
+            linea = linea.strip()
+            if not linea or linea.startswith("#"):
+                continue
+            try:
+                argumentos = parser.parse_args(shlex.split(linea))
+                if argumentos.funcion is cmd_lote:
+                    raise SystemExit("'lote' no puede anidarse.")
+                resultado = argumentos.funcion(argumentos)
+            except SystemExit as e:
+                resultado = e.code if isinstance(e.code, int) else 2
+                if isinstance(e.code, str):
+                    print(f"Línea {numero}: {e.code}", file=sys.stderr)
+            except Exception as e:
+                print(f"Línea {numero}: {type(e).__name__}: {e}", file=sys.stderr)
+                resultado = 1
+            codigo = codigo or resultado
+            if resultado and args.detener_en_error:
+                break
+    return codigo
+
+
+def construir_parser():
+    parser = argparse.ArgumentParser(prog="cli_alimentos", description="Operaciones por lotes sobre la colección de alimentos.")
+    parser.add_argument("-v", "--verboso", action="store_true", help="Muestra los mensajes informativos en stderr")
+    parser.add_argument("--uri", help="URI de MongoDB (por defecto, MONGO_URI)")
+    parser.add_argument("--base", help="Base de datos (por defecto, MONGO_DB_NAME)")
+    parser.add_argument("--coleccion", help="Colección (por defecto, MONGO_COLLECTION_NAME)")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    importar = subparsers.add_parser("importar", help="Carga alimentos desde JSON o NDJSON")
+    importar.add_argument("archivo", help="Ruta del archivo (.json, .ndjson, opcionalmente .gz) o '-'")
+    importar.add_argument("--formato", choices=["auto", "json", "ndjson"], default="auto")
+    importar.add_argument("--lote", type=int, default=1000, help="Documentos por insert_many")
+    importar.set_defaults(funcion=cmd_importar)
+
+    exportar = subparsers.add_parser("exportar", help="Escribe los alimentos como NDJSON")
+    exportar.add_argument("--salida", default="-", help="Archivo de salida (.gz para comprimir); por defecto stdout")
+    exportar.add_argument("--filtro", type=_filtro_json, help="Filtro de MongoDB en JSON, ej. '{\"categoria\": \"Fruta\"}'")
+    exportar.add_argument("--campos", help="Campos a incluir, separados por coma")
+    exportar.add_argument("--lote", type=int, default=1000, help="Tamaño de lote del cursor")
+    exportar.set_defaults(funcion=cmd_exportar)
+
+    consultar = subparsers.add_parser("consultar", help="Busca alimentos y los escribe como NDJSON")
+    consultar.add_argument("tipo", choices=TIPOS_DE_CONSULTA)
+    consultar.add_argument("valores", nargs="*", help="Valor de búsqueda (calorias: MIN MAX)")
+    consultar.add_argument("--campos", help="Campos a incluir, separados por coma")
+    consultar.add_argument("--limite", type=int, default=None, help="Máximo de resultados")
+    consultar.set_defaults(funcion=cmd_consultar)
+
+    actualizar = subparsers.add_parser("actualizar", help="Actualiza un campo o aplica cambios desde NDJSON")
+    actualizar.add_argument("nombre", nargs="?")
+    actualizar.add_argument("campo", nargs="?")
+    actualizar.add_argument("valor", nargs="?", help="Se interpreta como JSON si es posible")
+    actualizar.add_argument("--archivo", help='NDJSON con líneas {"nombre": ..., "campos": {...}}')
+    actualizar.add_argument("--lote", type=int, default=1000)
+    actualizar.set_defaults(funcion=cmd_actualizar)
+
+    # Con prefix_chars="+" las opciones que siguen ("--escala 5", "--help") no se interpretan
+    # acá: llegan tal cual a benchmark_alimentos.
+    bench = subparsers.add_parser("bench", help="Corre benchmark_alimentos (ver 'bench --help')",
+                                  prefix_chars="+", add_help=False)
+    bench.add_argument("argumentos", nargs=argparse.REMAINDER)
+    bench.set_defaults(funcion=cmd_bench)
+
+    lote = subparsers.add_parser("lote", help="Ejecuta un subcomando por línea con una sola conexión")
+    lote.add_argument("archivo", help="Archivo con un subcomando por línea ('#' comenta), o '-'")
+    lote.add_argument("--detener-en-error", action="store_true")
+    lote.set_defaults(funcion=cmd_lote)
+    return parser
+
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    # Las variables se leen al importar app_alimentos, que todavía no se importó.
+    for variable, valor in (("MONGO_URI", args.uri), ("MONGO_DB_NAME", args.base),
+                            ("MONGO_COLLECTION_NAME", args.coleccion)):
+        if valor:
+            os.environ[variable] = valor
+    logging.basicConfig(stream=sys.stderr, format="%(message)s",
+                        level=logging.INFO if args.verboso else logging.WARNING)
+    try:
+        return args.funcion(args)
+    finally:
+        if "app_alimentos" in sys.modules:
+            sys.modules["app_alimentos"].cerrar_conexion()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Exportación columnar del catálogo para análisis vectorizado con NumPy.
+
+`exportar_columnas` recorre la colección por lotes (solo los campos numéricos,
+categoría y alérgenos) y arma un `CatalogoColumnar`: un array por campo numérico,
+las porciones aplanadas con un array de offsets (las porciones del alimento i son
+`offsets[i]:offsets[i + 1]`) y categoria/alergenos/unidad codificados como
+diccionario (códigos enteros + lista de valores). Los valores faltantes son NaN.
+
+Con esto los filtros y puntajes sobre todo el catálogo se expresan como
+operaciones de NumPy en vez de bucles de Python por documento:
+
+    catalogo = exportar_columnas()
+    mascara = (catalogo.proporcion_proteinas() > 0.3) & ~catalogo.mascara_alergeno("gluten")
+    catalogo.nombres_de(mascara)
+
+`a_tabla_arrow` convierte el resultado en una tabla de Arrow si pyarrow está instalado.
+"""
+from array import array
+
+import numpy as np
+
+from app_alimentos import TAMANO_LOTE_POR_DEFECTO, iterar_alimentos
+
+CAMPOS_COLUMNARES = ["_id", "nombre", "categoria", "porciones", "macros", "fibra_g", "azucar_g", "alergenos"]
+CAMPOS_MACROS = ("proteinas_g", "carbohidratos_g", "grasas_g")
+
+# kcal por gramo de cada macronutriente (factores de Atwater).
+KCAL_POR_GRAMO = {"proteinas_g": 4.0, "carbohidratos_g": 4.0, "grasas_g": 9.0}
+
+
+def _numero(valor):
+    return float(valor) if isinstance(valor, (int, float)) and not isinstance(valor, bool) else np.nan
+
+
+class _Diccionario:
+    """Codifica valores repetidos como enteros (índice en `valores`)."""
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codigo(self, valor):
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+
+class CatalogoColumnar:
+    """Catálogo en columnas de NumPy; cada fila es un alimento."""
+
+    def __init__(self, ids, nombres, categorias, categoria_codigos, macros, fibra_g, azucar_g,
+                 porciones_offsets, porciones_calorias, porciones_gramos, unidades, porciones_unidad_codigos,
+                 alergenos, alergenos_offsets, alergenos_codigos):
+        self.ids = ids
+        self.nombres = nombres
+        self.categorias = categorias
+        self.categoria_codigos = categoria_codigos
+        self.macros = macros  # {"proteinas_g": array, ...}
+        self.fibra_g = fibra_g
+        self.azucar_g = azucar_g
+        self.porciones_offsets = porciones_offsets
+        self.porciones_calorias = porciones_calorias
+        self.porciones_gramos = porciones_gramos
+        self.unidades = unidades
+        self.porciones_unidad_codigos = porciones_unidad_codigos
+        self.alergenos = alergenos
+        self.alergenos_offsets = alergenos_offsets
+        self.alergenos_codigos = alergenos_codigos
+
+    def __len__(self):
+        return len(self.nombres)
+
+    # --- Porciones y alérgenos (listas aplanadas) ---
+    def _fila_de_porcion(self):
+        return np.repeat(np.arange(len(self)), np.diff(self.porciones_offsets))
+
+    def _fila_de_alergeno(self):
+        return np.repeat(np.arange(len(self)), np.diff(self.alergenos_offsets))
+
+    def calorias_promedio(self):
+        """Promedio de calorías de las porciones de cada alimento (NaN si no tiene)."""
+        validas = ~np.isnan(self.porciones_calorias)
+        filas = self._fila_de_porcion()[validas]
+        sumas = np.bincount(filas, weights=self.porciones_calorias[validas], minlength=len(self))
+        cuentas = np.bincount(filas, minlength=len(self))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(cuentas > 0, sumas / cuentas, np.nan)
+
+    def mascara_rango_calorias(self, min_calorias, max_calorias):
+        """Alimentos con al menos una porción en [min, max] (igual que consulta_rango_calorias)."""
+        en_rango = (self.porciones_calorias >= min_calorias) & (self.porciones_calorias <= max_calorias)
+        return np.bincount(self._fila_de_porcion()[en_rango], minlength=len(self)) > 0
+
+    def mascara_categoria(self, categoria):
+        try:
+            codigo = self.categorias.index(categoria)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+        return self.categoria_codigos == codigo
+
+    def mascara_alergeno(self, alergia):
+        """Alimentos que contienen el alérgeno."""
+        try:
+            codigo = self.alergenos.index(alergia)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+        filas = self._fila_de_alergeno()[self.alergenos_codigos == codigo]
+        return np.bincount(filas, minlength=len(self)) > 0
+
+    # --- Macros ---
+    def kcal_de_macros(self):
+        """Energía estimada a partir de los macros (factores de Atwater)."""
+        return sum(self.macros[campo] * KCAL_POR_GRAMO[campo] for campo in CAMPOS_MACROS)
+
+    def proporcion_macro(self, campo):
+        """Fracción de la energía de los macros que aporta `campo` (NaN si no hay energía)."""
+        total = self.kcal_de_macros()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, self.macros[campo] * KCAL_POR_GRAMO[campo] / total, np.nan)
+
+    def proporcion_proteinas(self):
+        return self.proporcion_macro("proteinas_g")
+
+    # --- Resultados ---
+    def nombres_de(self, mascara_o_indices):
+        """Nombres de las filas seleccionadas por una máscara booleana o array de índices."""
+        return self.nombres[mascara_o_indices].tolist()
+
+    def mejores(self, puntaje, cantidad=10, mascara=None):
+        """Índices de las `cantidad` filas con mayor puntaje (ignorando NaN y filas fuera de la máscara)."""
+        puntaje = np.where(np.isnan(puntaje), -np.inf, puntaje)
+        if mascara is not None:
+            puntaje = np.where(mascara, puntaje, -np.inf)
+        cantidad = min(cantidad, int(np.isfinite(puntaje).sum()))
+        if cantidad <= 0:
+            return np.array([], dtype=np.int64)
+        candidatos = np.argpartition(-puntaje, cantidad - 1)[:cantidad]
+        return candidatos[np.argsort(-puntaje[candidatos])]
+
+    def a_tabla_arrow(self):
+        """Convierte el catálogo en un pyarrow.Table (porciones como lista, textos como diccionario)."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("a_tabla_arrow requiere pyarrow (pip install pyarrow).") from None
+        offsets = pa.array(self.porciones_offsets.astype(np.int32))
+        porciones = pa.StructArray.from_arrays(
+            [pa.DictionaryArray.from_arrays(pa.array(self.porciones_unidad_codigos), pa.array(self.unidades, pa.string())),
+             pa.array(self.porciones_gramos, from_pandas=True),
+             pa.array(self.porciones_calorias, from_pandas=True)],
+            names=["unidad", "gramos", "calorias"])
+        alergenos = pa.DictionaryArray.from_arrays(pa.array(self.alergenos_codigos),
+                                                   pa.array(self.alergenos, pa.string()))
+        columnas = {
+            "_id": pa.array([str(i) for i in self.ids]),
+            "nombre": pa.array(self.nombres.tolist(), pa.string()),
+            "categoria": pa.DictionaryArray.from_arrays(pa.array(self.categoria_codigos),
+                                                        pa.array(self.categorias, pa.string())),
+            "porciones": pa.ListArray.from_arrays(offsets, porciones),
+            "fibra_g": pa.array(self.fibra_g, from_pandas=True),
+            "azucar_g": pa.array(self.azucar_g, from_pandas=True),
+            "alergenos": pa.ListArray.from_arrays(pa.array(self.alergenos_offsets.astype(np.int32)), alergenos),
+        }
+        for campo in CAMPOS_MACROS:
+            columnas[campo] = pa.array(self.macros[campo], from_pandas=True)
+        return pa.table(columnas)
+
+
+def exportar_columnas(query=None, batch_size=TAMANO_LOTE_POR_DEFECTO):
+    """Lee los alimentos que cumplen `query` y devuelve un CatalogoColumnar.
+
+    Los valores se acumulan en arrays tipados de `array` mientras llegan los lotes,
+    así nunca se mantiene en memoria la lista de documentos completa.
+    """
+    ids, nombres = [], []
+    categorias, unidades, alergenos = _Diccionario(), _Diccionario(), _Diccionario()
+    categoria_codigos = array("i")
+    macros = {campo: array("d") for campo in CAMPOS_MACROS}
+    fibra_g, azucar_g = array("d"), array("d")
+    porciones_offsets, porciones_calorias, porciones_gramos = array("q", [0]), array("d"), array("d")
+    porciones_unidad_codigos = array("i")
+    alergenos_offsets, alergenos_codigos = array("q", [0]), array("i")
+
+    proyeccion = {campo: 1 for campo in CAMPOS_COLUMNARES}
+    for alimento in iterar_alimentos(query, proyeccion, batch_size=batch_size):
+        ids.append(alimento.get("_id"))
+        nombres.append(alimento.get("nombre"))
+        categoria_codigos.append(categorias.codigo(alimento.get("categoria")))
+        valores_macros = alimento.get("macros") or {}
+        for campo in CAMPOS_MACROS:
+            macros[campo].append(_numero(valores_macros.get(campo)))
+        fibra_g.append(_numero(alimento.get("fibra_g")))
+        azucar_g.append(_numero(alimento.get("azucar_g")))
+        for porcion in alimento.get("porciones") or []:
+            porciones_calorias.append(_numero(porcion.get("calorias")))
+            porciones_gramos.append(_numero(porcion.get("gramos")))
+            porciones_unidad_codigos.append(unidades.codigo(porcion.get("unidad")))
+        porciones_offsets.append(len(porciones_calorias))
+        for alergeno in alimento.get("alergenos") or []:
+            alergenos_codigos.append(alergenos.codigo(alergeno))
+        alergenos_offsets.append(len(alergenos_codigos))
+
+    return CatalogoColumnar(
+        ids=np.array(ids, dtype=object),
+        nombres=np.array(nombres, dtype=object),
+        categorias=categorias.valores,
+        categoria_codigos=np.frombuffer(categoria_codigos, dtype=np.int32),
+        macros={campo: np.frombuffer(valores, dtype=np.float64) for campo, valores in macros.items()},
+        fibra_g=np.frombuffer(fibra_g, dtype=np.float64),
+        azucar_g=np.frombuffer(azucar_g, dtype=np.float64),
+        porciones_offsets=np.frombuffer(porciones_offsets, dtype=np.int64),
+        porciones_calorias=np.frombuffer(porciones_calorias, dtype=np.float64),
+        porciones_gramos=np.frombuffer(porciones_gramos, dtype=np.float64),
+        unidades=unidades.valores,
+        porciones_unidad_codigos=np.frombuffer(porciones_unidad_codigos, dtype=np.int32),
+        alergenos=alergenos.valores,
+        alergenos_offsets=np.frombuffer(alergenos_offsets, dtype=np.int64),
+        alergenos_codigos=np.frombuffer(alergenos_codigos, dtype=np.int32),
+    )
@@ -0,0 +1,110 @@
+"""Recorrido paralelo de toda la colección, particionada por rangos de _id.
+
+`escanear_en_paralelo(mapear, reducir)` divide la colección en rangos de _id, procesa
+cada rango en un proceso distinto (cada uno con su propio cliente de MongoDB, como
+garantiza ConexionMongo tras un fork o al arrancar un proceso nuevo) y combina los
+resultados parciales:
+
+- `mapear(documentos)` recibe un iterador con los documentos de una partición y
+  devuelve un resultado parcial.
+- `reducir(a, b)` combina dos resultados parciales en uno.
+
+Ambas funciones deben poder serializarse con pickle (funciones definidas a nivel de
+módulo), porque viajan a los procesos hijos. Así la decodificación de BSON y el
+cálculo se reparten entre núcleos en lugar de quedar en un solo hilo de Python.
+
+    from collections import Counter
+    def contar(documentos):
+        return Counter(doc.get("categoria") for doc in documentos)
+    escanear_en_paralelo(contar, lambda a, b: a + b, projection=["categoria"])
+"""
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app_alimentos import TAMANO_LOTE_POR_DEFECTO, get_collection, iterar_alimentos, logger
+
+MUESTRAS_POR_PARTICION = 20
+
+
+def _tipo_bson(valor):
+    """Tipo con el que MongoDB compara el valor en un rango: todos los números juntos, bool aparte."""
+    if isinstance(valor, bool):
+        return bool
+    if isinstance(valor, (int, float)):
+        return float
+    return type(valor)
+
+
+def limites_de_particiones(cantidad, collection=None, query=None):
+    """Devuelve hasta `cantidad` rangos (desde, hasta) de _id que cubren la colección.
+
+    Los límites salen de una muestra aleatoria de _id ($sample), por lo que las
+    particiones quedan de tamaño parecido sin recorrer la colección. El primer rango
+    empieza en None y el último termina en None (sin límite). Si la muestra mezcla
+    tipos de _id (ObjectId y textos, por ejemplo), devuelve una sola partición.
+    """
+    if collection is None:
+        collection = get_collection()
+    if collection is None or cantidad <= 1:
+        return [(None, None)]
+    pipeline = [{"$match": query}] if query else []
+    pipeline += [{"$sample": {"size": cantidad * MUESTRAS_POR_PARTICION}}, {"$project": {"_id": 1}}]
+    muestra = [doc["_id"] for doc in collection.aggregate(pipeline)]
+    if not muestra:
+        return [(None, None)]
+    tipos = {_tipo_bson(_id) for _id in muestra}
+    try:
+        if len(tipos) > 1:
+            raise TypeError(", ".join(sorted(tipo.__name__ for tipo in tipos)))
+        muestra.sort()
+    except TypeError as e:
+        # Un rango de _id solo abarca valores de un mismo tipo BSON: no se puede partir.
+        logger.warning("Los _id no son de un solo tipo ordenable (%s); se usa una sola partición.", e)
+        return [(None, None)]
+    cortes = []
+    for i in range(1, cantidad):
+        corte = muestra[i * len(muestra) // cantidad]
+        if not cortes or corte != cortes[-1]:
+            cortes.append(corte)
+    bordes = [None] + cortes + [None]
+    return list(zip(bordes[:-1], bordes[1:]))
+
+
+def filtro_de_particion(desde, hasta, query=None):
+    """Filtro de los documentos con desde <= _id < hasta (None = sin límite)."""
+    rango = {}
+    if desde is not None:
+        rango["$gte"] = desde
+    if hasta is not None:
+        rango["$lt"] = hasta
+    condiciones = [c for c in (query, {"_id": rango} if rango else None) if c]
+    if not condiciones:
+        return {}
+    return condiciones[0] if len(condiciones) == 1 else {"$and": condiciones}
+
+
+def _procesar_particion(mapear, desde, hasta, query, projection, batch_size):
+    """Corre en el proceso hijo: aplica `mapear` a los documentos de una partición."""
+    return mapear(iterar_alimentos(filtro_de_particion(desde, hasta, query), projection, batch_size=batch_size))
+
+
+def escanear_en_paralelo(mapear, reducir, query=None, projection=None, procesos=None,
+                         particiones=None, batch_size=TAMANO_LOTE_POR_DEFECTO):
+    """Aplica `mapear` a cada partición en un pool de procesos y combina con `reducir`.
+
+    `particiones` (por defecto, 4 por proceso) conviene que sea mayor que `procesos`
+    para repartir mejor la carga. Con `procesos=1` todo corre en el proceso actual,
+    útil para depurar los callbacks.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    limites = limites_de_particiones(particiones or procesos * 4, query=query)
+    tareas = [(mapear, desde, hasta, query, projection, batch_size) for desde, hasta in limites]
+    logger.info("Escaneo paralelo: %d particiones en %d procesos.", len(tareas), procesos)
+    if procesos == 1:
+        parciales = [_procesar_particion(*tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            futuros = [executor.submit(_procesar_particion, *tarea) for tarea in tareas]
+            parciales = [futuro.result() for futuro in futuros]
+    return functools.reduce(reducir, parciales)
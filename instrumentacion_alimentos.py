@@ -0,0 +1,333 @@
+"""Instrumentación de las operaciones CRUD: tiempos, monitoreo de comandos y log de consultas lentas.
+
+Al activarla:
+- cada función CRUD de app_alimentos se envuelve para medir su latencia y errores;
+- un CommandListener de PyMongo mide cada comando enviado al servidor (latencia,
+  documentos devueltos y, con `medir_bytes=True`, bytes enviados/recibidos),
+  etiquetado con la función CRUD que lo originó;
+- los comandos que superan el umbral se registran en el logger "alimentos.lentas"
+  con la forma del filtro (sin valores) y, opcionalmente, un resumen de explain().
+
+Las métricas van a una interfaz intercambiable (`Metricas`); `MetricasPrometheus`
+las guarda en memoria y las exporta en formato de texto de Prometheus. Desactivada,
+no queda ninguna función envuelta y el listener sale en la primera línea.
+
+Uso:
+    import instrumentacion_alimentos as instr
+    metricas = instr.activar_instrumentacion(umbral_lento_ms=50)  # antes de conectar
+    ...
+    print(metricas.exportar_texto())
+"""
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+
+import bson
+from pymongo import monitoring
+
+import app_alimentos as A
+
+logger_lentas = logging.getLogger("alimentos.lentas")
+
+# Límites (en segundos) de los histogramas de latencia.
+LIMITES_LATENCIA_S = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+# Funciones de app_alimentos que se miden: las CRUD públicas (por su prefijo) que devuelven
+# un resultado; los generadores (iterar_*) no, porque su trabajo ocurre al recorrerlos.
+PREFIJOS_CRUD = ("crear_", "cargar_", "leer_", "buscar_", "paginar_", "actualizar_", "agregar_",
+                 "aplicar_", "rellenar_", "eliminar_")
+
+
+def _funciones_crud():
+    return sorted(nombre for nombre, funcion in vars(A).items()
+                  if nombre.startswith(PREFIJOS_CRUD) and inspect.isfunction(funcion)
+                  and funcion.__module__ == A.__name__ and not inspect.isgeneratorfunction(funcion))
+
+
+FUNCIONES_INSTRUMENTADAS = _funciones_crud()
+
+# Operación CRUD en curso, para etiquetar los comandos que genera.
+_operacion_actual = contextvars.ContextVar("operacion_alimentos", default="ninguna")
+
+
+# --- Interfaz de métricas ---
+class Metricas:
+    """Destino de las métricas. Subclasificar para enviarlas a otro sistema."""
+
+    def observar(self, nombre, valor, **etiquetas):
+        """Registra una observación en el histograma `nombre`."""
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        """Suma `valor` al contador `nombre`."""
+
+
+class _Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1) # la última es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+def _etiquetas_prometheus(etiquetas):
+    if not etiquetas:
+        return ""
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+class MetricasPrometheus(Metricas):
+    """Guarda histogramas y contadores en memoria y los exporta en formato de texto de Prometheus."""
+
+    def __init__(self, limites=LIMITES_LATENCIA_S):
+        self.limites = list(limites)
+        self._histogramas = {} # nombre -> {etiquetas: _Histograma}
+        self._contadores = {} # nombre -> {etiquetas: valor}
+        self._lock = threading.Lock()
+
+    def observar(self, nombre, valor, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            series = self._histogramas.setdefault(nombre, {})
+            histograma = series.get(clave)
+            if histograma is None:
+                histograma = series[clave] = _Histograma(self.limites)
+            histograma.observar(valor)
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            series = self._contadores.setdefault(nombre, {})
+            series[clave] = series.get(clave, 0) + valor
+
+    def exportar_texto(self):
+        """Devuelve todas las métricas en el formato de exposición de texto de Prometheus."""
+        lineas = []
+        with self._lock:
+            for nombre, series in sorted(self._histogramas.items()):
+                lineas.append(f"# TYPE {nombre} histogram")
+                for etiquetas, histograma in sorted(series.items()):
+                    acumulado = 0
+                    for limite, cuenta in zip(self.limites + ["+Inf"], histograma.cuentas):
+                        acumulado += cuenta
+                        lineas.append(f"{nombre}_bucket{_etiquetas_prometheus(etiquetas + (('le', limite),))} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_etiquetas_prometheus(etiquetas)} {histograma.suma}")
+                    lineas.append(f"{nombre}_count{_etiquetas_prometheus(etiquetas)} {histograma.total}")
+            for nombre, series in sorted(self._contadores.items()):
+                lineas.append(f"# TYPE {nombre} counter")
+                for etiquetas, valor in sorted(series.items()):
+                    lineas.append(f"{nombre}{_etiquetas_prometheus(etiquetas)} {valor}")
+        return "\n".join(lineas) + "\n"
+
+
+# --- Monitoreo de comandos ---
+def forma_del_filtro(filtro):
+    """Reemplaza los valores de un filtro por su tipo, conservando campos y operadores."""
+    if isinstance(filtro, dict):
+        return {clave: forma_del_filtro(valor) for clave, valor in filtro.items()}
+    if isinstance(filtro, (list, tuple)):
+        return [forma_del_filtro(valor) for valor in filtro]
+    return type(filtro).__name__
+
+
+def _filtro_del_comando(comando):
+    """Extrae el filtro de find/count/distinct, o el de la primera sentencia de update/delete."""
+    if "filter" in comando:
+        return comando["filter"]
+    if "query" in comando:
+        return comando["query"]
+    for campo in ("updates", "deletes"):
+        sentencias = comando.get(campo)
+        if sentencias:
+            return sentencias[0].get("q")
+    if "pipeline" in comando:
+        return comando["pipeline"]
+    return None
+
+
+def _documentos_en_respuesta(respuesta):
+    cursor = respuesta.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return respuesta.get("n", 0)
+
+
+class MonitorComandos(monitoring.CommandListener):
+    """CommandListener que mide los comandos y registra los que superan el umbral."""
+
+    def __init__(self, metricas, umbral_lento_ms=100, medir_bytes=False, explicar_lentas=False):
+        self.metricas = metricas
+        self.umbral_lento_s = umbral_lento_ms / 1000
+        self.medir_bytes = medir_bytes
+        self.explicar_lentas = explicar_lentas
+        self.activo = True
+        self._en_curso = {} # request_id -> (operación, filtro, colección)
+        self._pendientes = threading.local() # consultas lentas a explicar al terminar la operación
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if not self.activo:
+            return
+        comando = event.command
+        if self.medir_bytes:
+            self.metricas.incrementar("alimentos_comando_bytes_total", len(bson.encode(comando)),
+                                      comando=event.command_name, operacion=_operacion_actual.get(),
+                                      direccion="enviados")
+        filtro = _filtro_del_comando(comando)
+        with self._lock:
+            self._en_curso[(event.connection_id, event.request_id)] = (
+                _operacion_actual.get(), filtro, comando.get(event.command_name))
+
+    def succeeded(self, event):
+        if not self.activo:
+            return
+        self._terminar(event, fallo=False)
+
+    def failed(self, event):
+        if not self.activo:
+            return
+        self._terminar(event, fallo=True)
+
+    def _terminar(self, event, fallo):
+        with self._lock:
+            operacion, filtro, coleccion = self._en_curso.pop(
+                (event.connection_id, event.request_id), (_operacion_actual.get(), None, None))
+        segundos = event.duration_micros / 1_000_000
+        etiquetas = {"comando": event.command_name, "operacion": operacion}
+        self.metricas.observar("alimentos_comando_segundos", segundos, **etiquetas)
+        if fallo:
+            self.metricas.incrementar("alimentos_comando_errores_total", **etiquetas)
+        else:
+            respuesta = event.reply
+            self.metricas.incrementar("alimentos_comando_documentos_total", _documentos_en_respuesta(respuesta), **etiquetas)
+            if self.medir_bytes:
+                self.metricas.incrementar("alimentos_comando_bytes_total", len(bson.encode(respuesta)),
+                                          direccion="recibidos", **etiquetas)
+        if segundos >= self.umbral_lento_s:
+            self.metricas.incrementar("alimentos_comandos_lentos_total", **etiquetas)
+            logger_lentas.warning("Comando lento %s (%s) en %.1f ms, colección %s, filtro %s",
+                                  event.command_name, operacion, segundos * 1000, coleccion,
+                                  forma_del_filtro(filtro) if filtro is not None else "-")
+            if self.explicar_lentas and event.command_name == "find" and filtro is not None:
+                pendientes = getattr(self._pendientes, "lista", None)
+                if pendientes is not None:
+                    pendientes.append(filtro)
+
+    def explicar_pendientes(self, collection):
+        """Corre explain() de las consultas lentas de esta operación (fuera del listener)."""
+        pendientes = getattr(self._pendientes, "lista", None)
+        self._pendientes.lista = []
+        if not pendientes:
+            return
+        token = _operacion_actual.set("explain") # no etiquetar el explain como la operación original
+        try:
+            for filtro in pendientes:
+                logger_lentas.warning("explain() de %s: %s", forma_del_filtro(filtro),
+                                      resumen_explain(collection, filtro))
+        finally:
+            _operacion_actual.reset(token)
+
+    def iniciar_operacion(self):
+        if self.explicar_lentas:
+            self._pendientes.lista = []
+
+
+def resumen_explain(collection, filtro):
+    """Resume el plan de una consulta: etapas del plan ganador y claves/documentos examinados."""
+    try:
+        explicacion = collection.find(filtro).explain()
+    except Exception as e:
+        return {"error": str(e)}
+    estadisticas = explicacion.get("executionStats", {})
+    plan = explicacion.get("queryPlanner", {}).get("winningPlan", {})
+    return {
+        "etapas": list(A._etapas_del_plan(plan)),
+        "claves_examinadas": estadisticas.get("totalKeysExamined"),
+        "documentos_examinados": estadisticas.get("totalDocsExamined"),
+        "devueltos": estadisticas.get("nReturned"),
+    }
+
+
+# --- Activación ---
+_originales = {}
+_monitor = None
+
+
+def _instrumentar(nombre, funcion, metricas, monitor):
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        # Solo la operación más externa etiqueta los comandos (las funciones se llaman entre sí).
+        externa = _operacion_actual.get() == "ninguna"
+        token = _operacion_actual.set(nombre) if externa else None
+        if externa:
+            monitor.iniciar_operacion()
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        except Exception:
+            metricas.incrementar("alimentos_operacion_errores_total", operacion=nombre)
+            raise
+        finally:
+            metricas.observar("alimentos_operacion_segundos", time.perf_counter() - inicio, operacion=nombre)
+            if externa:
+                _operacion_actual.reset(token)
+                if monitor.explicar_lentas and A.collection_global is not None:
+                    monitor.explicar_pendientes(A.collection_global)
+    return envoltura
+
+
+def activar_instrumentacion(metricas=None, umbral_lento_ms=100, medir_bytes=False, explicar_lentas=False):
+    """Envuelve las funciones CRUD y registra el listener de comandos. Devuelve las métricas.
+
+    El listener se registra globalmente en PyMongo, por lo que solo ve los clientes
+    creados después de activarla: conviene llamarla antes del primer get_collection().
+    `medir_bytes` viene apagado: el evento solo trae el comando y la respuesta ya
+    decodificados, así que contarlos obliga a volver a codificar cada uno a BSON.
+    """
+    global _monitor
+    metricas = metricas or MetricasPrometheus()
+    if _monitor is None:
+        _monitor = MonitorComandos(metricas, umbral_lento_ms, medir_bytes, explicar_lentas)
+        monitoring.register(_monitor)
+    else:
+        # PyMongo no permite quitar un listener global: se reutiliza el ya registrado.
+        _monitor.metricas = metricas
+        _monitor.umbral_lento_s = umbral_lento_ms / 1000
+        _monitor.medir_bytes = medir_bytes
+        _monitor.explicar_lentas = explicar_lentas
+        _monitor.activo = True
+    if A.client_global is not None:
+        A.logger.warning("Ya existe un cliente de MongoDB; sus comandos no se monitorean hasta reconectar.")
+
+    desactivar_funciones()
+    for nombre in FUNCIONES_INSTRUMENTADAS:
+        funcion = getattr(A, nombre)
+        _originales[nombre] = funcion
+        setattr(A, nombre, _instrumentar(nombre, funcion, metricas, _monitor))
+    return metricas
+
+
+def desactivar_funciones():
+    """Restaura las funciones originales de app_alimentos."""
+    for nombre, funcion in _originales.items():
+        setattr(A, nombre, funcion)
+    _originales.clear()
+
+
+def desactivar_instrumentacion():
+    """Quita las envolturas y apaga el listener de comandos."""
+    desactivar_funciones()
+    if _monitor is not None:
+        _monitor.activo = False
@@ -0,0 +1,189 @@
+"""Modelo tipado y compacto de los documentos de alimentos.
+
+`Alimento`, `Porcion`, `Macros` y `Micronutriente` usan __slots__ (sin __dict__
+por instancia), guardan los arrays como tuplas e internan los textos repetidos
+(categoría, unidad, alérgenos, micronutrientes), de modo que un catálogo grande
+en memoria ocupa bastante menos que los mismos documentos como dicts anidados.
+
+Los campos no proyectados quedan en None. Los iteradores de este módulo usan la
+decodificación normal a dict (la más rápida de PyMongo, en C): el ahorro viene de
+proyectar solo los campos necesarios y de no retener los dicts, que se descartan
+apenas se convierten al modelo.
+"""
+import sys
+
+from app_alimentos import (
+    TAMANO_LOTE_POR_DEFECTO,
+    consulta_alergeno,
+    consulta_categoria,
+    consulta_micronutriente,
+    consulta_rango_calorias,
+    get_collection,
+    iterar_alimentos,
+    normalizar_proyeccion,
+)
+
+
+def _texto(valor):
+    """Interna los textos para que los valores repetidos compartan un solo objeto."""
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+def _tupla(valores, convertir):
+    if valores is None:
+        return None
+    return tuple(convertir(valor) for valor in valores)
+
+
+class _Modelo:
+    """Base común: igualdad, repr y conversión a dict a partir de __slots__."""
+    __slots__ = ()
+
+    def a_documento(self):
+        """Devuelve el dict equivalente, omitiendo los campos que no se cargaron."""
+        documento = {}
+        for campo in self.__slots__:
+            valor = getattr(self, campo)
+            if valor is None:
+                continue
+            if isinstance(valor, _Modelo):
+                valor = valor.a_documento()
+            elif isinstance(valor, tuple):
+                valor = [v.a_documento() if isinstance(v, _Modelo) else v for v in valor]
+            documento[campo] = valor
+        return documento
+
+    def __eq__(self, otro):
+        if type(otro) is not type(self):
+            return NotImplemented
+        return all(getattr(self, campo) == getattr(otro, campo) for campo in self.__slots__)
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__
+                           if getattr(self, campo) is not None)
+        return f"{type(self).__name__}({campos})"
+
+
+class Porcion(_Modelo):
+    __slots__ = ("unidad", "cantidad", "gramos", "calorias")
+
+    def __init__(self, unidad=None, cantidad=None, gramos=None, calorias=None):
+        self.unidad = _texto(unidad)
+        self.cantidad = cantidad
+        self.gramos = gramos
+        self.calorias = calorias
+
+    @classmethod
+    def desde_documento(cls, doc):
+        return cls(doc.get("unidad"), doc.get("cantidad"), doc.get("gramos"), doc.get("calorias"))
+
+
+class Macros(_Modelo):
+    __slots__ = ("proteinas_g", "carbohidratos_g", "grasas_g")
+
+    def __init__(self, proteinas_g=None, carbohidratos_g=None, grasas_g=None):
+        self.proteinas_g = proteinas_g
+        self.carbohidratos_g = carbohidratos_g
+        self.grasas_g = grasas_g
+
+    @classmethod
+    def desde_documento(cls, doc):
+        return cls(doc.get("proteinas_g"), doc.get("carbohidratos_g"), doc.get("grasas_g"))
+
+
+class Micronutriente(_Modelo):
+    __slots__ = ("nombre", "cantidad_mg")
+
+    def __init__(self, nombre=None, cantidad_mg=None):
+        self.nombre = _texto(nombre)
+        self.cantidad_mg = cantidad_mg
+
+    @classmethod
+    def desde_documento(cls, doc):
+        return cls(doc.get("nombre"), doc.get("cantidad_mg"))
+
+
+class Alimento(_Modelo):
+    __slots__ = ("_id", "nombre", "categoria", "porciones", "macros", "micronutrientes",
+                 "fibra_g", "azucar_g", "alergenos", "fecha_creacion")
+
+    def __init__(self, _id=None, nombre=None, categoria=None, porciones=None, macros=None,
+                 micronutrientes=None, fibra_g=None, azucar_g=None, alergenos=None, fecha_creacion=None):
+        self._id = _id
+        self.nombre = nombre
+        self.categoria = _texto(categoria)
+        self.porciones = porciones
+        self.macros = macros
+        self.micronutrientes = micronutrientes
+        self.fibra_g = fibra_g
+        self.azucar_g = azucar_g
+        self.alergenos = alergenos
+        self.fecha_creacion = fecha_creacion
+
+    @classmethod
+    def desde_documento(cls, doc):
+        """Construye un Alimento desde un documento (proyectado o completo)."""
+        macros = doc.get("macros")
+        return cls(
+            _id=doc.get("_id"),
+            nombre=doc.get("nombre"),
+            categoria=doc.get("categoria"),
+            porciones=_tupla(doc.get("porciones"), Porcion.desde_documento),
+            macros=Macros.desde_documento(macros) if macros is not None else None,
+            micronutrientes=_tupla(doc.get("micronutrientes"), Micronutriente.desde_documento),
+            fibra_g=doc.get("fibra_g"),
+            azucar_g=doc.get("azucar_g"),
+            alergenos=_tupla(doc.get("alergenos"), _texto),
+            fecha_creacion=doc.get("fecha_creacion"),
+        )
+
+    def calorias_promedio(self):
+        """Promedio de calorías de sus porciones (None si no se cargaron)."""
+        calorias = [p.calorias for p in self.porciones or () if p.calorias is not None]
+        return sum(calorias) / len(calorias) if calorias else None
+
+
+# --- Lecturas tipadas ---
+def iterar_alimentos_tipados(query=None, campos=None, batch_size=TAMANO_LOTE_POR_DEFECTO):
+    """Genera Alimento para cada documento que cumple la consulta.
+
+    `campos` (lista de campos o proyección en dict) limita lo que se transfiere y
+    se decodifica; los demás atributos quedan en None.
+    """
+    for documento in iterar_alimentos(query, normalizar_proyeccion(campos), batch_size=batch_size):
+        yield Alimento.desde_documento(documento)
+
+
+def buscar_alimento_tipado(nombre_alimento, campos=None):
+    """Devuelve el Alimento con ese nombre, o None si no existe."""
+    collection = get_collection()
+    if collection is None:
+        return None
+    documento = collection.find_one({"nombre": nombre_alimento}, normalizar_proyeccion(campos))
+    return Alimento.desde_documento(documento) if documento is not None else None
+
+
+def buscar_tipados_por_rango_calorias(min_calorias, max_calorias, campos=None):
+    return list(iterar_alimentos_tipados(consulta_rango_calorias(min_calorias, max_calorias), campos))
+
+
+def buscar_tipados_por_categoria(categoria, campos=None):
+    return list(iterar_alimentos_tipados(consulta_categoria(categoria), campos))
+
+
+def buscar_tipados_con_micronutriente(nombre_micronutriente, campos=None):
+    return list(iterar_alimentos_tipados(consulta_micronutriente(nombre_micronutriente), campos))
+
+
+def buscar_tipados_por_alergenos(alergia, campos=None):
+    return list(iterar_alimentos_tipados(consulta_alergeno(alergia), campos))
+
+
+def cargar_catalogo_tipado(campos=("nombre", "categoria", "porciones", "macros", "alergenos"),
+                           batch_size=TAMANO_LOTE_POR_DEFECTO):
+    """Carga todo el catálogo como lista de Alimento, sin micronutrientes por defecto.
+
+    Pensado para procesos que mantienen el catálogo completo en memoria (por ejemplo,
+    el recomendador): pedir solo los campos necesarios reduce red, decodificación y memoria.
+    """
+    return list(iterar_alimentos_tipados({}, campos, batch_size=batch_size))
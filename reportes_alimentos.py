@@ -0,0 +1,194 @@
+"""Reportes de nutrición calculados en el servidor con pipelines de agregación.
+
+Cada reporte tiene una función `pipeline_*` que arma el pipeline (para poder
+reutilizarlo o inspeccionarlo) y una función que lo ejecuta con allowDiskUse,
+de modo que por la red solo viajan los resúmenes y no los documentos.
+"""
+import time
+from collections import defaultdict
+
+from app_alimentos import get_collection, iterar_todos_alimentos, logger
+
+# Límites por defecto de los histogramas ($bucket usa [límite_i, límite_i+1)).
+LIMITES_CALORIAS = [0, 50, 100, 150, 200, 300, 500, 1000]
+LIMITES_PROTEINAS = [0, 1, 5, 10, 20, 40, 100]
+
+
+def _agregar(pipeline, collection=None):
+    """Ejecuta un pipeline con allowDiskUse y devuelve la lista de resultados."""
+    if collection is None:
+        collection = get_collection()
+    if collection is None:
+        return []
+    try:
+        return list(collection.aggregate(pipeline, allowDiskUse=True))
+    except Exception as e:
+        logger.error("Error al ejecutar el reporte: %s", e)
+        return []
+
+
+# --- Estadísticas por categoría ---
+def pipeline_estadisticas_por_categoria():
+    """Cantidad, calorías promedio/mín/máx y macros promedio por categoría."""
+    return [
+        # Calorías del alimento = promedio de sus porciones.
+        {"$project": {
+            "categoria": 1,
+            "calorias": {"$avg": "$porciones.calorias"},
+            "proteinas_g": "$macros.proteinas_g",
+            "carbohidratos_g": "$macros.carbohidratos_g",
+            "grasas_g": "$macros.grasas_g",
+        }},
+        {"$group": {
+            "_id": "$categoria",
+            "cantidad": {"$sum": 1},
+            "calorias_promedio": {"$avg": "$calorias"},
+            "calorias_min": {"$min": "$calorias"},
+            "calorias_max": {"$max": "$calorias"},
+            "proteinas_promedio_g": {"$avg": "$proteinas_g"},
+            "carbohidratos_promedio_g": {"$avg": "$carbohidratos_g"},
+            "grasas_promedio_g": {"$avg": "$grasas_g"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def estadisticas_por_categoria(collection=None):
+    """Devuelve una fila de estadísticas por categoría."""
+    return _agregar(pipeline_estadisticas_por_categoria(), collection)
+
+
+# --- Distribución de proteínas ---
+def pipeline_distribucion_proteinas(limites=LIMITES_PROTEINAS):
+    """Cuenta alimentos por rango de proteínas (macros.proteinas_g)."""
+    return [
+        {"$bucket": {
+            "groupBy": "$macros.proteinas_g",
+            "boundaries": list(limites),
+            "default": "fuera_de_rango",
+            # $firstN acota los ejemplos mientras agrupa; $push + $slice acumularía todos los nombres.
+            "output": {"cantidad": {"$sum": 1}, "ejemplos": {"$firstN": {"n": 5, "input": "$nombre"}}},
+        }},
+    ]
+
+
+def distribucion_proteinas(limites=LIMITES_PROTEINAS, collection=None):
+    """Devuelve la cantidad de alimentos en cada rango de proteínas."""
+    return _agregar(pipeline_distribucion_proteinas(limites), collection)
+
+
+# --- Histograma de calorías por porción ---
+def pipeline_histograma_calorias(limites=LIMITES_CALORIAS):
+    """Cuenta porciones por rango de calorías (cada porción cuenta por separado)."""
+    return [
+        {"$unwind": "$porciones"},
+        {"$bucket": {
+            "groupBy": "$porciones.calorias",
+            "boundaries": list(limites),
+            "default": "fuera_de_rango",
+            "output": {"porciones": {"$sum": 1}},
+        }},
+    ]
+
+
+def histograma_calorias(limites=LIMITES_CALORIAS, collection=None):
+    """Devuelve la cantidad de porciones en cada rango de calorías."""
+    return _agregar(pipeline_histograma_calorias(limites), collection)
+
+
+# --- Conteo de alérgenos ---
+def pipeline_conteo_alergenos():
+    """Cuenta en cuántos alimentos aparece cada alérgeno."""
+    return [
+        {"$unwind": "$alergenos"},
+        {"$group": {"_id": "$alergenos", "alimentos": {"$sum": 1}}},
+        {"$sort": {"alimentos": -1, "_id": 1}},
+    ]
+
+
+def conteo_alergenos(collection=None):
+    """Devuelve cada alérgeno con la cantidad de alimentos que lo contienen."""
+    return _agregar(pipeline_conteo_alergenos(), collection)
+
+
+# --- Totales de micronutrientes ---
+def pipeline_totales_micronutrientes():
+    """Suma y promedia la cantidad de cada micronutriente en todo el catálogo."""
+    return [
+        {"$unwind": "$micronutrientes"},
+        {"$group": {
+            "_id": "$micronutrientes.nombre",
+            "alimentos": {"$sum": 1},
+            "total_mg": {"$sum": "$micronutrientes.cantidad_mg"},
+            "promedio_mg": {"$avg": "$micronutrientes.cantidad_mg"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def totales_micronutrientes(collection=None):
+    """Devuelve el total y promedio de cada micronutriente."""
+    return _agregar(pipeline_totales_micronutrientes(), collection)
+
+
+# --- Benchmark: servidor vs. cliente ---
+def estadisticas_por_categoria_en_cliente():
+    """Versión ingenua de estadisticas_por_categoria que trae todos los documentos a Python."""
+    acumulado = defaultdict(lambda: {"cantidad": 0, "suma_calorias": 0.0, "cuenta_calorias": 0,
+                                     "calorias_min": None, "calorias_max": None})
+    for alimento in iterar_todos_alimentos():
+        fila = acumulado[alimento.get("categoria")]
+        fila["cantidad"] += 1
+        calorias = [p["calorias"] for p in alimento.get("porciones", []) if "calorias" in p]
+        if calorias:
+            promedio = sum(calorias) / len(calorias)
+            fila["suma_calorias"] += promedio
+            fila["cuenta_calorias"] += 1
+            fila["calorias_min"] = promedio if fila["calorias_min"] is None else min(fila["calorias_min"], promedio)
+            fila["calorias_max"] = promedio if fila["calorias_max"] is None else max(fila["calorias_max"], promedio)
+    return [
+        {"_id": categoria, "cantidad": fila["cantidad"],
+         "calorias_promedio": fila["suma_calorias"] / fila["cuenta_calorias"] if fila["cuenta_calorias"] else None,
+         "calorias_min": fila["calorias_min"], "calorias_max": fila["calorias_max"]}
+        for categoria, fila in sorted(acumulado.items(), key=lambda item: str(item[0]))
+    ]
+
+
+def comparar_servidor_vs_cliente(repeticiones=3):
+    """Mide estadisticas_por_categoria en el servidor contra la versión en cliente.
+
+    Devuelve el mejor tiempo (en segundos) de cada una sobre `repeticiones` ejecuciones.
+    """
+    def mejor_tiempo(funcion):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos)
+
+    return {
+        "servidor_s": mejor_tiempo(estadisticas_por_categoria),
+        "cliente_s": mejor_tiempo(estadisticas_por_categoria_en_cliente),
+    }
+
+
+if __name__ == "__main__":
+    print("\n--- Estadísticas por categoría ---")
+    for fila in estadisticas_por_categoria():
+        print(fila)
+    print("\n--- Distribución de proteínas ---")
+    for fila in distribucion_proteinas():
+        print(fila)
+    print("\n--- Histograma de calorías por porción ---")
+    for fila in histograma_calorias():
+        print(fila)
+    print("\n--- Alérgenos ---")
+    for fila in conteo_alergenos():
+        print(fila)
+    print("\n--- Micronutrientes ---")
+    for fila in totales_micronutrientes():
+        print(fila)
+    print("\n--- Servidor vs. cliente (estadísticas por categoría) ---")
+    tiempos = comparar_servidor_vs_cliente()
+    print(f"Servidor: {tiempos['servidor_s'] * 1000:.1f} ms, cliente: {tiempos['cliente_s'] * 1000:.1f} ms")
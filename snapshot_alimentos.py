@@ -0,0 +1,304 @@
+"""Snapshot local de solo lectura del catálogo, servido con mmap.
+
+`crear_snapshot(ruta)` vuelca la colección a disco y publica el resultado de forma
+atómica; `MotorSnapshot(ruta)` responde las mismas búsquedas que app_alimentos
+(`buscar_por_nombre`, `buscar_por_rango_calorias`, ...) sin ir a MongoDB.
+
+Formato de cada snapshot (un directorio `snapshot-<marca>` dentro de `ruta`):
+
+- documentos.bin: los documentos en BSON, uno tras otro, en el orden del cursor.
+- documentos_offsets.npy: el documento i ocupa [offsets[i], offsets[i + 1]).
+- nombre_hash.npy / nombre_filas.npy: hash de 64 bits de cada nombre, ordenado, y
+  su fila (búsqueda binaria y luego se compara el nombre real).
+- calorias_valores.npy / calorias_filas.npy: las calorías de todas las porciones,
+  ordenadas, y la fila a la que pertenece cada una (rangos con búsqueda binaria).
+- postings.npy + indices.json: para categoria, alergenos y micronutrientes.nombre,
+  cada valor apunta a un tramo [inicio, fin) de postings con sus filas ordenadas.
+
+Todos los .npy se abren con mmap_mode="r" y documentos.bin con mmap, así que los
+procesos que leen el mismo snapshot comparten las páginas del page cache. La
+publicación reemplaza el enlace simbólico `ruta/actual` con os.replace: los lectores
+ven el snapshot viejo o el nuevo, nunca uno a medio escribir.
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+from collections import defaultdict
+
+import bson
+import numpy as np
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from app_alimentos import TAMANO_LOTE_POR_DEFECTO, iterar_alimentos, logger, normalizar_proyeccion
+
+ENLACE_ACTUAL = "actual"
+SNAPSHOTS_CONSERVADOS = 2
+INDICES_POR_VALOR = {
+    "categoria": lambda doc: [doc.get("categoria")],
+    "alergenos": lambda doc: doc.get("alergenos") or [],
+    "micronutrientes.nombre": lambda doc: [m.get("nombre") for m in doc.get("micronutrientes") or []],
+}
+
+
+def _hash_nombre(nombre):
+    return int.from_bytes(hashlib.blake2b(str(nombre).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _guardar_npy(directorio, nombre, valores, dtype):
+    np.save(os.path.join(directorio, nombre), np.asarray(valores, dtype=dtype))
+
+
+# --- Creación y publicación ---
+def crear_snapshot(ruta, query=None, batch_size=TAMANO_LOTE_POR_DEFECTO):
+    """Vuelca los alimentos a un nuevo snapshot en `ruta` y lo publica como actual.
+
+    Los documentos se piden como RawBSONDocument para escribir sus bytes tal cual,
+    sin decodificarlos y volver a codificarlos. Devuelve la ruta del snapshot creado.
+    """
+    os.makedirs(ruta, exist_ok=True)
+    destino = os.path.join(ruta, f"snapshot-{time.strftime('%Y%m%d%H%M%S')}-{time.time_ns() % 10 ** 9:09d}-{os.getpid()}")
+    temporal = destino + ".tmp"
+    os.makedirs(temporal)
+    offsets, nombre_hash, calorias_valores, calorias_filas = [0], [], [], []
+    postings_por_indice = {campo: defaultdict(list) for campo in INDICES_POR_VALOR}
+    try:
+        with open(os.path.join(temporal, "documentos.bin"), "wb") as archivo:
+            documentos = iterar_alimentos(query, batch_size=batch_size,
+                                          codec_options=CodecOptions(document_class=RawBSONDocument))
+            fila = 0
+            for documento in documentos:
+                crudo = documento.raw if isinstance(documento, RawBSONDocument) else bson.encode(documento)
+                archivo.write(crudo)
+                offsets.append(offsets[-1] + len(crudo))
+                nombre_hash.append(_hash_nombre(documento.get("nombre")))
+                for porcion in documento.get("porciones") or []:
+                    if isinstance(porcion.get("calorias"), (int, float)):
+                        calorias_valores.append(porcion["calorias"])
+                        calorias_filas.append(fila)
+                for campo, valores_de in INDICES_POR_VALOR.items():
+                    for valor in set(valores_de(documento)):
+                        if valor is not None:
+                            postings_por_indice[campo][valor].append(fila)
+                fila += 1
+
+        _guardar_npy(temporal, "documentos_offsets.npy", offsets, np.int64)
+        orden = np.argsort(np.asarray(nombre_hash, dtype=np.uint64), kind="stable")
+        _guardar_npy(temporal, "nombre_hash.npy", np.asarray(nombre_hash, dtype=np.uint64)[orden], np.uint64)
+        _guardar_npy(temporal, "nombre_filas.npy", orden, np.int64)
+        orden = np.argsort(np.asarray(calorias_valores, dtype=np.float64), kind="stable")
+        _guardar_npy(temporal, "calorias_valores.npy", np.asarray(calorias_valores, dtype=np.float64)[orden], np.float64)
+        _guardar_npy(temporal, "calorias_filas.npy", np.asarray(calorias_filas, dtype=np.int64)[orden], np.int64)
+
+        postings, indices = [], {}
+        for campo, por_valor in postings_por_indice.items():
+            indices[campo] = {}
+            for valor, filas in por_valor.items():
+                indices[campo][valor] = [len(postings), len(postings) + len(filas)]
+                postings.extend(filas)
+        _guardar_npy(temporal, "postings.npy", postings, np.int64)
+        with open(os.path.join(temporal, "indices.json"), "w", encoding="utf-8") as archivo:
+            json.dump({"documentos": len(offsets) - 1, "indices": indices}, archivo, ensure_ascii=False)
+
+        os.rename(temporal, destino)
+    except Exception:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    publicar_snapshot(ruta, destino)
+    logger.info("Snapshot creado en %s con %d alimentos.", destino, len(offsets) - 1)
+    return destino
+
+
+def publicar_snapshot(ruta, destino):
+    """Apunta `ruta/actual` a `destino` de forma atómica y borra snapshots viejos."""
+    enlace = os.path.join(ruta, ENLACE_ACTUAL)
+    temporal = f"{enlace}.{os.getpid()}.tmp"
+    os.symlink(os.path.basename(destino), temporal)
+    os.replace(temporal, enlace)
+    limpiar_snapshots(ruta)
+
+
+def limpiar_snapshots(ruta, conservar=SNAPSHOTS_CONSERVADOS):
+    """Borra los snapshots más viejos, salvo el actual y los `conservar` más recientes.
+
+    Los lectores que todavía tengan abierto uno borrado siguen leyéndolo: el sistema
+    libera los archivos cuando se cierra el último mmap.
+    """
+    actual = os.path.realpath(os.path.join(ruta, ENLACE_ACTUAL))
+    snapshots = sorted(nombre for nombre in os.listdir(ruta)
+                       if nombre.startswith("snapshot-") and not nombre.endswith(".tmp"))
+    for nombre in snapshots[:-conservar] if conservar else snapshots:
+        directorio = os.path.join(ruta, nombre)
+        if os.path.realpath(directorio) != actual:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+# --- Lectura ---
+_FALTA = object()
+
+
+def _incluir(valor, partes):
+    """Parte de `valor` que queda al incluir la ruta `partes` (o _FALTA si no existe)."""
+    if not partes:
+        return valor
+    if isinstance(valor, dict):
+        if partes[0] not in valor:
+            return _FALTA
+        interno = _incluir(valor[partes[0]], partes[1:])
+        return _FALTA if interno is _FALTA else {partes[0]: interno}
+    if isinstance(valor, list):
+        return [interno for interno in (_incluir(elemento, partes) for elemento in valor) if interno is not _FALTA]
+    return _FALTA
+
+
+def _fusionar(destino, origen):
+    for campo, valor in origen.items():
+        actual = destino.get(campo)
+        if isinstance(actual, dict) and isinstance(valor, dict):
+            _fusionar(actual, valor)
+        elif isinstance(actual, list) and isinstance(valor, list) and len(actual) == len(valor):
+            for a, b in zip(actual, valor):
+                if isinstance(a, dict) and isinstance(b, dict):
+                    _fusionar(a, b)
+        else:
+            destino[campo] = valor
+
+
+def _excluir(valor, partes):
+    """Copia de `valor` sin la ruta `partes`; dentro de un array se quita de cada documento."""
+    if isinstance(valor, dict):
+        if partes[0] not in valor:
+            return valor
+        copia = dict(valor)
+        if len(partes) == 1:
+            del copia[partes[0]]
+        else:
+            copia[partes[0]] = _excluir(valor[partes[0]], partes[1:])
+        return copia
+    if isinstance(valor, list):
+        return [_excluir(elemento, partes) for elemento in valor]
+    return valor
+
+
+def _proyectar(documento, projection):
+    """Aplica una proyección como lo haría MongoDB (inclusión o exclusión, con notación de punto)."""
+    if not projection:
+        return documento
+    incluir = [campo for campo, valor in projection.items() if valor and campo != "_id"]
+    if not incluir:
+        resultado = dict(documento)
+        for campo, valor in projection.items():
+            if not valor:
+                resultado = _excluir(resultado, campo.split("."))
+        return resultado
+    resultado = {}
+    if projection.get("_id", 1) and "_id" in documento:
+        resultado["_id"] = documento["_id"]
+    for campo in incluir:
+        parcial = _incluir(documento, campo.split("."))
+        if parcial is not _FALTA:
+            _fusionar(resultado, parcial)
+    return resultado
+
+
+class MotorSnapshot:
+    """Responde las búsquedas de app_alimentos desde el snapshot publicado en `ruta`."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.directorio = None
+        self._archivo = None
+        self._datos = None
+        self.abrir()
+
+    def abrir(self):
+        """Abre (o reabre) el snapshot al que apunta `ruta/actual`."""
+        directorio = os.path.realpath(os.path.join(self.ruta, ENLACE_ACTUAL))
+        cargar = lambda nombre: np.load(os.path.join(directorio, nombre), mmap_mode="r")
+        with open(os.path.join(directorio, "indices.json"), encoding="utf-8") as archivo:
+            meta = json.load(archivo)
+        archivo = open(os.path.join(directorio, "documentos.bin"), "rb")
+        datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(archivo.fileno()).st_size else b""
+        offsets = cargar("documentos_offsets.npy")
+        nombre_hash, nombre_filas = cargar("nombre_hash.npy"), cargar("nombre_filas.npy")
+        calorias_valores, calorias_filas = cargar("calorias_valores.npy"), cargar("calorias_filas.npy")
+        postings = cargar("postings.npy")
+
+        anterior = self._archivo, self._datos
+        self.directorio, self._archivo, self._datos = directorio, archivo, datos
+        self._offsets, self._nombre_hash, self._nombre_filas = offsets, nombre_hash, nombre_filas
+        self._calorias_valores, self._calorias_filas = calorias_valores, calorias_filas
+        self._postings, self._indices, self.cantidad = postings, meta["indices"], meta["documentos"]
+        self._cerrar(*anterior)
+
+    def recargar_si_cambio(self):
+        """Reabre el snapshot si se publicó uno nuevo; devuelve True si cambió."""
+        if os.path.realpath(os.path.join(self.ruta, ENLACE_ACTUAL)) == self.directorio:
+            return False
+        self.abrir()
+        return True
+
+    @staticmethod
+    def _cerrar(archivo, datos):
+        if isinstance(datos, mmap.mmap):
+            datos.close()
+        if archivo is not None:
+            archivo.close()
+
+    def cerrar(self):
+        self._cerrar(self._archivo, self._datos)
+        self._archivo = self._datos = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __len__(self):
+        return self.cantidad
+
+    # --- Acceso a documentos ---
+    def documento(self, fila):
+        """Decodifica el documento de la fila indicada."""
+        inicio, fin = int(self._offsets[fila]), int(self._offsets[fila + 1])
+        return bson.decode(self._datos[inicio:fin])
+
+    def _documentos(self, filas, projection=None):
+        projection = normalizar_proyeccion(projection)
+        return [_proyectar(self.documento(fila), projection) for fila in filas]
+
+    def _filas_de(self, campo, valor):
+        tramo = self._indices[campo].get(valor)
+        return self._postings[tramo[0]:tramo[1]] if tramo else ()
+
+    # --- API de búsqueda (misma firma que app_alimentos) ---
+    def leer_todos_alimentos(self, projection=None):
+        return self._documentos(range(self.cantidad), projection)
+
+    def buscar_por_nombre(self, nombre_alimento, projection=None):
+        clave = np.uint64(_hash_nombre(nombre_alimento))
+        inicio = np.searchsorted(self._nombre_hash, clave, side="left")
+        fin = np.searchsorted(self._nombre_hash, clave, side="right")
+        for fila in self._nombre_filas[inicio:fin]:
+            documento = self.documento(int(fila))
+            if documento.get("nombre") == nombre_alimento:
+                return _proyectar(documento, normalizar_proyeccion(projection))
+        return None
+
+    def buscar_por_rango_calorias(self, min_calorias, max_calorias, projection=None):
+        inicio = np.searchsorted(self._calorias_valores, min_calorias, side="left")
+        fin = np.searchsorted(self._calorias_valores, max_calorias, side="right")
+        return self._documentos(np.unique(self._calorias_filas[inicio:fin]).tolist(), projection)
+
+    def buscar_por_categoria_y_proyectar(self, categoria, campos_a_proyectar, projection=None):
+        return self._documentos(self._filas_de("categoria", categoria), projection or campos_a_proyectar)
+
+    def buscar_alimentos_con_micronutriente(self, nombre_micronutriente, projection=None):
+        return self._documentos(self._filas_de("micronutrientes.nombre", nombre_micronutriente), projection)
+
+    def buscar_por_alergenos(self, alergia, projection=None):
+        return self._documentos(self._filas_de("alergenos", alergia), projection)